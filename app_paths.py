@@ -0,0 +1,16 @@
+import os
+import sys
+
+
+def data_dir(name):
+    root = os.environ.get("PDF_EDITOR_DATA_DIR")
+    if not root:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            root = os.path.join(base, "PDF Editor")
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+            root = os.path.join(base, "pdf_editor")
+    path = os.path.join(root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from page_ranges import parse_page_ranges
+from pdf_engine import DEFAULT_SAVE_PROFILE, SAVE_PROFILES, LazyPdfEngine
+
+COMMANDS = ("merge", "insert", "extract", "rotate", "reorder", "run")
+PATH_FIELDS = ("input", "insert", "output")
+
+
+class JobError(Exception):
+    pass
+
+
+def _step(timings, phase, func, *args):
+    start = time.perf_counter()
+    ok, err = func(*args)
+    timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+    if not ok:
+        raise JobError(err)
+
+
+def _require(job, field):
+    value = job.get(field)
+    if value in (None, "", []):
+        raise JobError(f"'{field}' 항목이 필요합니다.")
+    return value
+
+
+def _pages(job, field, engine, default=None):
+    expression = job.get(field, default)
+    if expression is None:
+        raise JobError(f"'{field}' 항목이 필요합니다.")
+    try:
+        return parse_page_ranges(expression, engine.page_count())
+    except ValueError as exc:
+        raise JobError(str(exc)) from None
+
+
+def _save(engine, job, timings):
+    output = _require(job, "output")
+    folder = os.path.dirname(os.path.abspath(output))
+    os.makedirs(folder, exist_ok=True)
+    _step(timings, "save", engine.save, output, job.get("profile"))
+
+
+def merge_job(engine, job, timings):
+    inputs = _require(job, "inputs")
+    _step(timings, "open", engine.open, inputs[0])
+    for path in inputs[1:]:
+        _step(timings, "edit", engine.insert_pdf, path)
+    _save(engine, job, timings)
+
+
+def insert_job(engine, job, timings):
+    _step(timings, "open", engine.open, _require(job, "input"))
+    after = job.get("after")
+    index = engine.page_count() if after is None else int(after)
+    if index < 0 or index > engine.page_count():
+        raise JobError("유효하지 않은 페이지입니다.")
+    _step(timings, "edit", engine.insert_pdf_at, _require(job, "insert"), index)
+    _save(engine, job, timings)
+
+
+def extract_job(engine, job, timings):
+    _step(timings, "open", engine.open, _require(job, "input"))
+    start = time.perf_counter()
+    indices = _pages(job, "pages", engine)
+    timings["edit"] = time.perf_counter() - start
+    output = _require(job, "output")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    _step(timings, "save", engine.export_pages, indices, output, job.get("profile"))
+
+
+def rotate_job(engine, job, timings):
+    _step(timings, "open", engine.open, _require(job, "input"))
+    angle = int(job.get("angle", 90))
+    if angle % 90:
+        raise JobError("회전 각도는 90의 배수여야 합니다.")
+    for index in sorted(set(_pages(job, "pages", engine, "all"))):
+        _step(timings, "edit", engine.rotate_page_by, index, angle)
+    _save(engine, job, timings)
+
+
+def reorder_job(engine, job, timings):
+    _step(timings, "open", engine.open, _require(job, "input"))
+    _step(timings, "edit", engine.reorder_pages, _pages(job, "order", engine))
+    _save(engine, job, timings)
+
+
+JOB_HANDLERS = {
+    "merge": merge_job,
+    "insert": insert_job,
+    "extract": extract_job,
+    "rotate": rotate_job,
+    "reorder": reorder_job,
+}
+
+
+def run_job(job):
+    record = {
+        "type": "job",
+        "index": job.get("index"),
+        "id": job.get("id"),
+        "op": job.get("op"),
+        "output": job.get("output"),
+        "ok": False,
+        "error": "",
+        "pages": 0,
+        "timings": {},
+        "save": None,
+    }
+    start = time.perf_counter()
+    engine = LazyPdfEngine()
+    try:
+        handler = JOB_HANDLERS.get(job.get("op"))
+        if handler is None:
+            raise JobError(f"알 수 없는 작업입니다: {job.get('op')}")
+        handler(engine, job, record["timings"])
+        record["ok"] = True
+        record["save"] = engine.save_report
+    except Exception as exc:
+        record["error"] = str(exc) or type(exc).__name__
+    finally:
+        record["pages"] = engine.page_count()
+        engine.close()
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def load_manifest(path):
+    with open(path, encoding="utf-8-sig") as handle:
+        text = handle.read()
+    if text.lstrip().startswith("["):
+        jobs = json.loads(text)
+    else:
+        jobs = [json.loads(line) for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    base = os.path.dirname(os.path.abspath(path))
+    return [resolve_job(job, base) for job in jobs]
+
+
+def resolve_job(job, base):
+    job = dict(job)
+    for field in PATH_FIELDS:
+        if job.get(field):
+            job[field] = os.path.join(base, job[field])
+    if job.get("inputs"):
+        job["inputs"] = [os.path.join(base, path) for path in job["inputs"]]
+    return job
+
+
+def iter_results(jobs, workers):
+    executor = None
+    if workers > 1 and len(jobs) > 1:
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError, ImportError):
+            executor = None
+    if executor is None:
+        for job in jobs:
+            yield run_job(job)
+        return
+    with executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_jobs(jobs, workers, report):
+    for position, job in enumerate(jobs):
+        job.setdefault("index", position)
+    start = time.perf_counter()
+    failed = 0
+    for record in iter_results(jobs, workers):
+        if not record["ok"]:
+            failed += 1
+        report.write(json.dumps(record, ensure_ascii=False) + "\n")
+        report.flush()
+    summary = {
+        "type": "summary",
+        "jobs": len(jobs),
+        "failed": failed,
+        "workers": workers,
+        "seconds": time.perf_counter() - start,
+    }
+    report.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    report.flush()
+    return failed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Headless PDF batch editing")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, help_text):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("-o", "--output", required=True)
+        command.add_argument("--report", default="-", help="JSON lines timing report path (default: stdout)")
+        command.add_argument(
+            "--profile",
+            choices=sorted(SAVE_PROFILES),
+            default=DEFAULT_SAVE_PROFILE,
+            help="save profile: fast, compact (garbage collection, deflate, object streams) or web (linearized)",
+        )
+        return command
+
+    command = add_command("merge", "merge PDFs in the given order")
+    command.add_argument("inputs", nargs="+")
+    command = add_command("insert", "insert a PDF after a page")
+    command.add_argument("input")
+    command.add_argument("insert")
+    command.add_argument("--after", type=int, help="number of pages before the insertion (default: end)")
+    command = add_command("extract", "write a page range to a new PDF")
+    command.add_argument("input")
+    command.add_argument("--pages", required=True, help="page ranges, e.g. 1-3,7,end or odd")
+    command = add_command("rotate", "rotate pages")
+    command.add_argument("input")
+    command.add_argument("--pages", default="all")
+    command.add_argument("--angle", type=int, default=90)
+    command = add_command("reorder", "reorder all pages")
+    command.add_argument("input")
+    command.add_argument("--order", required=True, help="new page order, e.g. end-1 or 2,1,3-end")
+
+    command = commands.add_parser("run", help="run a JSON or JSON lines manifest of jobs")
+    command.add_argument("manifest")
+    command.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    command.add_argument("--report", default="-", help="JSON lines timing report path (default: stdout)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        try:
+            jobs = load_manifest(args.manifest)
+        except (OSError, ValueError) as exc:
+            print(f"매니페스트를 읽을 수 없습니다: {exc}", file=sys.stderr)
+            return 2
+        workers = max(1, args.workers)
+    else:
+        job = {key: value for key, value in vars(args).items() if key not in ("command", "report") and value is not None}
+        job["op"] = args.command
+        jobs = [job]
+        workers = 1
+
+    if args.report == "-":
+        failed = run_jobs(jobs, workers, sys.stdout)
+    else:
+        with open(args.report, "w", encoding="utf-8") as report:
+            failed = run_jobs(jobs, workers, report)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
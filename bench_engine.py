@@ -0,0 +1,117 @@
+import argparse
+import os
+import tempfile
+import time
+
+import fitz
+
+from pdf_engine import LazyPdfEngine, PdfEngine
+
+
+def build_sample(path, page_count):
+    doc = fitz.open()
+    pixmap = fitz.Pixmap(fitz.csRGB, 256, 256, os.urandom(256 * 256 * 3), False)
+    image_xref = 0
+    for number in range(page_count):
+        page = doc.new_page()
+        if image_xref:
+            page.insert_image(fitz.Rect(72, 120, 328, 376), xref=image_xref)
+        else:
+            image_xref = page.insert_image(fitz.Rect(72, 120, 328, 376), pixmap=pixmap)
+        page.insert_text((72, 72), f"Page {number + 1}", fontname="tiro", fontsize=24)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def legacy_select(doc, indices):
+    new_doc = fitz.open()
+    for idx in indices:
+        new_doc.insert_pdf(doc, from_page=idx, to_page=idx)
+    return new_doc
+
+
+def legacy_export(doc, indices, path):
+    new_doc = legacy_select(doc, indices)
+    new_doc.save(path)
+    return new_doc
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run_case(sample, page_count):
+    order = list(range(page_count))[::-1]
+    keep = list(range(0, page_count, 2))
+    rows = []
+
+    doc = fitz.open(sample)
+    elapsed, new_doc = timed(lambda: legacy_select(doc, order))
+    rows.append(("reorder", "legacy", elapsed, len(new_doc.tobytes())))
+    new_doc.close()
+    elapsed, new_doc = timed(lambda: legacy_select(doc, keep))
+    rows.append(("keep", "legacy", elapsed, len(new_doc.tobytes())))
+    new_doc.close()
+    with tempfile.TemporaryDirectory() as folder:
+        target = os.path.join(folder, "legacy.pdf")
+        elapsed, new_doc = timed(lambda: legacy_export(doc, keep, target))
+        rows.append(("export", "legacy", elapsed, os.path.getsize(target)))
+        new_doc.close()
+    doc.close()
+
+    engine = PdfEngine()
+    engine.open(sample)
+    elapsed, _ = timed(lambda: engine.reorder_pages(order))
+    rows.append(("reorder", "select", elapsed, len(engine.doc.tobytes())))
+    engine.close()
+    engine.open(sample)
+    elapsed, _ = timed(lambda: engine.keep_pages(keep))
+    rows.append(("keep", "select", elapsed, len(engine.doc.tobytes())))
+    with tempfile.TemporaryDirectory() as folder:
+        target = os.path.join(folder, "select.pdf")
+        engine.close()
+        engine.open(sample)
+        elapsed, _ = timed(lambda: engine.export_pages(keep, target))
+        rows.append(("export", "select", elapsed, os.path.getsize(target)))
+    engine.close()
+
+    engine = LazyPdfEngine()
+    engine.open(sample)
+    elapsed, _ = timed(lambda: engine.reorder_pages(order))
+    rows.append(("reorder", "lazy", elapsed, len(engine.get_state_bytes())))
+    engine.close()
+    engine.open(sample)
+    elapsed, _ = timed(lambda: engine.keep_pages(keep))
+    rows.append(("keep", "lazy", elapsed, len(engine.get_state_bytes())))
+    engine.close()
+    engine.open(sample)
+    elapsed, _ = timed(lambda: engine.insert_pdf_at(sample, page_count // 2))
+    rows.append(("insert", "lazy", elapsed, len(engine.get_state_bytes())))
+    with tempfile.TemporaryDirectory() as folder:
+        target = os.path.join(folder, "lazy.pdf")
+        engine.close()
+        engine.open(sample)
+        elapsed, _ = timed(lambda: engine.export_pages(keep, target))
+        rows.append(("export", "lazy", elapsed, os.path.getsize(target)))
+    engine.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PdfEngine page selection benchmark")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'operation':<8} {'path':<7} {'seconds':>9} {'bytes':>12}")
+    with tempfile.TemporaryDirectory() as folder:
+        for page_count in args.pages:
+            sample = os.path.join(folder, f"sample_{page_count}.pdf")
+            build_sample(sample, page_count)
+            for operation, path, elapsed, size in run_case(sample, page_count):
+                print(f"{page_count:>6} {operation:<8} {path:<7} {elapsed:>9.3f} {size:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import customtkinter as ctk
+
+from tracing import tracer
+
+
+class DebugOverlay:
+    def __init__(self, app):
+        self.app = app
+        self.frame = None
+        self.label = None
+        self.visible = False
+        self.enabled_tracer = False
+        self.refresh_interval = 500
+        self.max_rows = 14
+        self._refresh_job = None
+
+    def toggle(self):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self):
+        if self.frame is None:
+            self._build()
+        if not tracer.enabled:
+            tracer.enabled = True
+            self.enabled_tracer = True
+        self.frame.place(relx=1.0, rely=1.0, x=-12, y=-12, anchor="se")
+        self.frame.lift()
+        self.visible = True
+        self._refresh()
+
+    def hide(self):
+        if self._refresh_job is not None:
+            self.app.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        if self.frame is not None:
+            self.frame.place_forget()
+        if self.enabled_tracer:
+            tracer.enabled = False
+            self.enabled_tracer = False
+        self.visible = False
+
+    def _build(self):
+        self.frame = ctk.CTkFrame(self.app, corner_radius=8, fg_color="#1B1B1B", border_width=1, border_color="#3A3A3A")
+        self.label = ctk.CTkLabel(self.frame, text="", font=("Consolas", 12), justify="left", anchor="w")
+        self.label.grid(row=0, column=0, columnspan=2, padx=10, pady=(8, 4), sticky="w")
+        ctk.CTkButton(self.frame, text="내보내기", width=80, height=26, command=self.export).grid(
+            row=1, column=0, padx=(10, 4), pady=(0, 8), sticky="w"
+        )
+        ctk.CTkButton(self.frame, text="초기화", width=80, height=26, command=tracer.clear).grid(
+            row=1, column=1, padx=(4, 10), pady=(0, 8), sticky="e"
+        )
+
+    def _refresh(self):
+        self._refresh_job = None
+        if not self.visible:
+            return
+        self.label.configure(text=self.format_summary())
+        self._refresh_job = self.app.after(self.refresh_interval, self._refresh)
+
+    def format_summary(self):
+        timings, counters = tracer.summary()
+        lines = [f"{'span':<28}{'n':>6}{'p50':>9}{'p95':>9}"]
+        rows = sorted(timings.items(), key=lambda item: item[1]["p95"], reverse=True)
+        for name, stats in rows[: self.max_rows]:
+            lines.append(f"{name[:27]:<28}{stats['count']:>6}{stats['p50']:>7.1f}ms{stats['p95']:>7.1f}ms")
+        if counters:
+            lines.append("")
+            for name in sorted(counters):
+                lines.append(f"{name[:27]:<28}{counters[name]:>6}")
+        lines.append("")
+        lines.extend(self._cache_lines())
+        return "\n".join(lines)
+
+    def stats(self):
+        app = self.app
+        return {
+            "thumbnails": app.thumbnail_cache.stats(),
+            "thumbnails (disk)": app.thumbnail_store.stats(),
+            "viewer tiles": app.viewer.cache.stats(),
+            "history": app.history.footprint(),
+        }
+
+    def _cache_lines(self):
+        stats = self.stats()
+        history = stats.pop("history")
+        lines = [f"{'cache':<20}{'hit':>5}{'hits':>8}{'misses':>8}{'MB':>14}"]
+        for name, cache in stats.items():
+            size = f"{cache['bytes'] / 1048576:.1f}/{cache['max_bytes'] / 1048576:.0f}"
+            lines.append(f"{name:<20}{cache['hit_rate']:>5.0%}{cache['hits']:>8}{cache['misses']:>8}{size:>14}")
+        lines.append("")
+        lines.append(
+            f"undo {history['undo_entries']}/{history['max_depth']}  redo {history['redo_entries']}  "
+            f"blobs {history['blobs']}"
+        )
+        lines.append(
+            f"undo log {history['log_bytes'] / 1048576:.2f}MB  blobs {history['memory_bytes'] / 1048576:.1f}MB  "
+            f"budget {history['memory_budget'] / 1048576:.0f}MB"
+        )
+        lines.append(
+            f"undo disk {history['disk_bytes'] / 1048576:.1f}MB  spill file {history['spill_file_bytes'] / 1048576:.1f}MB  "
+            f"raw {history['raw_bytes'] / 1048576:.1f}MB"
+        )
+        return lines
+
+    def export(self):
+        try:
+            jsonl_path, _chrome_path = tracer.export(stats=self.stats())
+        except OSError as exc:
+            self.app._set_status(f"추적 내보내기 실패: {exc}")
+            return
+        self.app._set_status(f"추적 저장: {jsonl_path}")
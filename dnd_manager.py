@@ -3,10 +3,18 @@ import tkinter as tk
 from PIL import ImageTk
 from tkinterdnd2 import COPY, DND_FILES
 
+from drag_export import DragExportCache
+
 
 class DndManager:
+    frame_interval = 16
+
     def __init__(self, app):
         self.app = app
+        self._motion_event = None
+        self._motion_job = None
+        self._indicator = None
+        self.exports = DragExportCache(app)
 
 
     def on_file_drop(self, event):
@@ -18,27 +26,13 @@ class DndManager:
 
         drop_index = None
         if app.page_widgets:
+            app.thumbnails.invalidate_geometry()
             target_index = self.find_closest_index(event.x_root, event.y_root)
             if target_index is not None:
                 insert_after = self.is_insert_after(target_index, event.x_root)
                 drop_index = target_index + 1 if insert_after else target_index
 
-        if app.engine.page_count() == 0:
-            app.handlers.open_pdf(pdfs[0])
-            pdfs = pdfs[1:]
-            drop_index = None
-
-        if drop_index is None:
-            for path in pdfs:
-                app.handlers.merge_pdf(path)
-            return
-
-        for path in pdfs:
-            before = app.engine.page_count()
-            app.handlers.insert_pdf_at(path, drop_index)
-            after = app.engine.page_count()
-            added = max(0, after - before)
-            drop_index += added
+        app.handlers.insert_files(pdfs, drop_index)
 
     def _parse_drop_files(self, data):
         if not data:
@@ -86,38 +80,24 @@ class DndManager:
             ctrl = bool(state & 0x0004)
         if not ctrl:
             return None
-        if app.engine.page_count() == 0:
+        if app.engine.page_count() == 0 or page_index is None:
             return None
 
-        if app.selected_indices:
-            indices = sorted(app.selected_indices)
-        else:
-            indices = [page_index]
+        if not app.selected_indices:
             app.selected_indices = {page_index}
             app._refresh_selection_styles()
 
-        path = self._export_selected_pages(indices)
+        path = self.exports.path_for(self._drag_out_indices(page_index))
         if not path:
             return None
         data = self._format_drop_path(path)
         return (COPY, DND_FILES, data)
 
-    def _export_selected_pages(self, indices):
+    def _drag_out_indices(self, page_index):
         app = self.app
-        import tempfile
-        fd, path = tempfile.mkstemp(prefix="pdf_edit_", suffix=".pdf")
-        os.close(fd)
-        ok, err = app.engine.export_pages(indices, path)
-        if not ok:
-            try:
-                os.remove(path)
-            except OSError:
-                pass
-            return None
-        if not hasattr(app, "dnd_temp_files"):
-            app.dnd_temp_files = []
-        app.dnd_temp_files.append(path)
-        return path
+        if app.selected_indices:
+            return sorted(app.selected_indices)
+        return [page_index]
 
     def _format_drop_path(self, path):
         if " " in path or "\t" in path:
@@ -128,15 +108,18 @@ class DndManager:
         app = self.app
         app._press_index = page_index
         app._press_pos = (event.x_root, event.y_root)
+        app.thumbnails.invalidate_geometry()
         app._drag_started = False
         app._external_drag_requested = bool(getattr(event, "state", 0) & 0x0004)
+        if app._external_drag_requested and app.engine.page_count() > 0:
+            self.exports.prepare(self._drag_out_indices(page_index))
 
     def on_drag_motion(self, event):
         app = self.app
         if app._external_drag_requested:
             if app.drag_ghost is None:
                 self.start_drag_ghost(event, app._press_index, alpha=0.4)
-            self.move_drag_ghost(event)
+            self._queue_motion(event)
             return
         if app._press_index is None:
             return
@@ -157,22 +140,47 @@ class DndManager:
             self.start_drag_ghost(event, app._press_index)
         if not app._drag_started:
             return
+        self._queue_motion(event)
+
+    def _queue_motion(self, event):
+        self._motion_event = event
+        if self._motion_job is None:
+            self._motion_job = self.app.after(self.frame_interval, self._flush_motion)
+
+    def _cancel_motion(self):
+        if self._motion_job is not None:
+            self.app.after_cancel(self._motion_job)
+            self._motion_job = None
+        self._motion_event = None
+
+    def _flush_motion(self):
+        app = self.app
+        self._motion_job = None
+        event = self._motion_event
+        self._motion_event = None
+        if event is None:
+            return
+        self.move_drag_ghost(event)
+        if not app._drag_started:
+            return
 
         target_index = self.find_closest_index(event.x_root, event.y_root)
         if target_index is None:
             return
 
         insert_after = self.is_insert_after(target_index, event.x_root)
-        drop_index = target_index + 1 if insert_after else target_index
         self.set_target_highlight(target_index)
-        app.drag_drop_index = drop_index
+        app.drag_drop_index = target_index + 1 if insert_after else target_index
         self.update_insert_indicator(target_index, insert_after)
-        self.move_drag_ghost(event)
 
     def on_drag_release(self, event):
         app = self.app
         if app._press_index is None:
             return
+        if self._motion_job is not None:
+            self.app.after_cancel(self._motion_job)
+            self._motion_job = None
+            self._flush_motion()
         if app._external_drag_requested:
             self.stop_drag_ghost()
             app._press_index = None
@@ -203,19 +211,7 @@ class DndManager:
         app = self.app
         if not app.page_widgets:
             return None
-
-        closest_index = None
-        closest_distance = None
-        for index, item in enumerate(app.page_widgets):
-            frame = item["frame"]
-            cx = frame.winfo_rootx() + frame.winfo_width() / 2
-            cy = frame.winfo_rooty() + frame.winfo_height() / 2
-            distance = (cx - x_root) ** 2 + (cy - y_root) ** 2
-            if closest_distance is None or distance < closest_distance:
-                closest_distance = distance
-                closest_index = index
-
-        return closest_index
+        return app.thumbnails.closest_index(x_root, y_root)
 
     def set_drag_highlight(self, frame, enabled, index):
         app = self.app
@@ -232,6 +228,10 @@ class DndManager:
 
     def set_target_highlight(self, target_index):
         app = self.app
+        target = app.page_widgets[target_index]
+        target_frame = target["frame"] if target is not None else None
+        if target_index == app.drag_target_index and target_frame is app.drag_target_frame:
+            return
         if (
             app.drag_target_frame is not None
             and app.drag_target_index != target_index
@@ -240,13 +240,13 @@ class DndManager:
             self.set_drag_highlight(app.drag_target_frame, False, app.drag_target_index)
 
         app.drag_target_index = target_index
-        app.drag_target_frame = app.page_widgets[target_index]["frame"]
-        if app.drag_target_frame is not app.drag_source_frame:
+        app.drag_target_frame = target_frame
+        if app.drag_target_frame is not None and app.drag_target_frame is not app.drag_source_frame:
             self.set_drag_highlight(app.drag_target_frame, True, target_index)
-        self.update_insert_indicator(target_index, False)
 
     def clear_drag_state(self):
         app = self.app
+        self._cancel_motion()
         if app.drag_source_frame is not None and app.drag_start_index is not None:
             self.set_drag_highlight(app.drag_source_frame, False, app.drag_start_index)
         if (
@@ -268,7 +268,10 @@ class DndManager:
         self.stop_drag_ghost()
         if page_index < 0 or page_index >= len(app.page_widgets):
             return
-        pil_image = app.page_widgets[page_index]["pil_image"]
+        item = app.page_widgets[page_index]
+        if item is None or item["pil_image"] is None:
+            return
+        pil_image = item["pil_image"]
         ghost = tk.Toplevel(app)
         ghost.wm_overrideredirect(True)
         ghost.attributes("-topmost", True)
@@ -303,32 +306,25 @@ class DndManager:
             return
         if target_index is None or not app.page_widgets:
             return
+        thumbnails = app.thumbnails
+        x0, y0 = thumbnails.cell_origin(target_index)
+        width, height = thumbnails.cell_size
+        gap = (thumbnails.pitch[0] - width) / 2
+        x_line = x0 + width + gap if insert_after else x0 - gap
+        indicator = (x_line, y0, x_line, y0 + height)
+        if indicator == self._indicator:
+            return
         canvas = app.scroll_frame._parent_canvas
-        frame = app.page_widgets[target_index]["frame"]
-        canvas.update_idletasks()
-        x0 = frame.winfo_rootx()
-        y0 = frame.winfo_rooty()
-        x1 = x0 + frame.winfo_width()
-        y1 = y0 + frame.winfo_height()
-        if insert_after:
-            x_line = x1 + 6
-        else:
-            x_line = x0 - 6
-        cx0 = canvas.winfo_rootx()
-        cy0 = canvas.winfo_rooty()
-        rel_x = x_line - cx0
-        rel_y0 = y0 - cy0
-        rel_y1 = y1 - cy0
-        canvas.coords(app.insert_line, rel_x, rel_y0, rel_x, rel_y1)
-        canvas.itemconfigure(app.insert_line, state="normal")
+        canvas.coords(app.insert_line, *indicator)
+        if self._indicator is None:
+            canvas.itemconfigure(app.insert_line, state="normal")
+        self._indicator = indicator
 
     def hide_insert_indicator(self):
         app = self.app
+        self._indicator = None
         if hasattr(app.scroll_frame, "_parent_canvas") and app.insert_line is not None:
             app.scroll_frame._parent_canvas.itemconfigure(app.insert_line, state="hidden")
 
     def is_insert_after(self, target_index, x_root):
-        app = self.app
-        frame = app.page_widgets[target_index]["frame"]
-        center = frame.winfo_rootx() + frame.winfo_width() / 2
-        return x_root >= center
+        return self.app.thumbnails.is_after_center(target_index, x_root)
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import fitz
+
+from pdf_engine import build_document, file_token, save_options
+
+
+def export_plan(task):
+    plan, path = task
+    docs = {}
+
+    def open_source(source_id):
+        if source_id not in docs:
+            docs[source_id] = fitz.open(plan["sources"][source_id])
+        return docs[source_id]
+
+    try:
+        for source_id, source_path in plan["sources"].items():
+            if file_token(source_path) != plan["tokens"][source_id]:
+                return False, "원본 파일이 변경되었습니다."
+        doc = build_document(plan, open_source)
+        try:
+            doc.save(path, **save_options(None))
+        finally:
+            doc.close()
+    except Exception as exc:
+        return False, str(exc)
+    finally:
+        for doc in docs.values():
+            doc.close()
+    return True, ""
+
+
+class DragExportCache:
+    max_bytes = 256 * 1024 * 1024
+    wait_timeout = 2.0
+
+    def __init__(self, app):
+        self.app = app
+        self.entries = OrderedDict()
+        self.folder = None
+        self.total_bytes = 0
+
+    def _key(self, clip):
+        data = json.dumps([clip["pages"], sorted(clip["tokens"].items())])
+        return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+    def prepare(self, indices):
+        clip = self.app.engine.clip_pages(indices)
+        if clip is None:
+            return None
+        key = self._key(clip)
+        entry = self.entries.get(key)
+        if entry is not None and entry["future"] is not None and entry["future"].cancelled():
+            self._drop(key)
+            entry = None
+        if entry is not None:
+            self.app.engine.release_clip(clip)
+            self.entries.move_to_end(key)
+            return key
+        entry = {
+            "path": self.temp_path(f"{key}.pdf"),
+            "clip": clip,
+            "future": None,
+            "ready": False,
+            "waiting": False,
+            "size": 0,
+        }
+        self.entries[key] = entry
+        futures = self.app.renderer.run_batch(
+            export_plan,
+            [(clip, entry["path"])],
+            lambda results, key=key: self._finish(key, results[0]),
+        )
+        entry["future"] = futures[0]
+        return key
+
+    def temp_path(self, name):
+        if self.folder is None:
+            self.folder = tempfile.mkdtemp(prefix="pdf_edit_drag_")
+        return os.path.join(self.folder, name)
+
+    def path_for(self, indices):
+        key = self.prepare(indices)
+        if key is None:
+            return None
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if not entry["ready"]:
+            future = entry["future"]
+            try:
+                if future is None:
+                    result = export_plan((entry["clip"], entry["path"]))
+                else:
+                    result = future.result(timeout=self.wait_timeout)
+            except Exception:
+                result = None
+            if result is not None:
+                self._finish(key, result)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.app._set_status("드래그할 PDF를 만들지 못했습니다.")
+                return None
+            if not entry["ready"]:
+                entry["waiting"] = True
+                self.app._set_status("드래그할 PDF를 준비하는 중입니다...")
+                return None
+        self.entries.move_to_end(key)
+        return entry["path"]
+
+    def _finish(self, key, result):
+        entry = self.entries.get(key)
+        if entry is None or entry["clip"] is None:
+            return
+        if result is None or not result[0]:
+            if entry["waiting"]:
+                self.app._set_status("드래그할 PDF를 만들지 못했습니다.")
+            self._drop(key)
+            return
+        if entry["waiting"]:
+            self.app._set_status("드래그 준비가 끝났습니다. 다시 끌어 주세요.")
+        self.app.engine.release_clip(entry["clip"])
+        entry["clip"] = None
+        entry["ready"] = True
+        try:
+            entry["size"] = os.path.getsize(entry["path"])
+        except OSError:
+            entry["size"] = 0
+        self.total_bytes += entry["size"]
+        self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            self._drop(key)
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        if entry["clip"] is not None:
+            self.app.engine.release_clip(entry["clip"])
+        if entry["ready"]:
+            self.total_bytes -= entry["size"]
+        try:
+            os.remove(entry["path"])
+        except OSError:
+            pass
+
+    def clear(self):
+        for key in list(self.entries):
+            self._drop(key)
+        if self.folder is not None:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self.folder = None
@@ -3,12 +3,20 @@ import os
 import customtkinter as ctk
 from tkinter import messagebox
 from tkinterdnd2 import DND_FILES, TkinterDnD
-from PIL import Image
-
-from pdf_engine import PdfEngine
+from pdf_engine import DEFAULT_SAVE_PROFILE, SAVE_PROFILE_LABELS, LazyPdfEngine
 from ui_components import UIComponents
 from event_handlers import PdfEventHandlers
 from dnd_manager import DndManager
+from thumbnail_panel import ThumbnailPanel
+from page_viewer import PageViewer
+from render_service import RenderService
+from save_service import SaveService
+from thumbnail_cache import ThumbnailCache
+from thumbnail_store import ThumbnailStore
+from history import UndoHistory
+from recovery import RecoveryJournal
+from tracing import traced, tracer
+from debug_overlay import DebugOverlay
 
 try:
     ctypes.windll.shcore.SetProcessDpiAwareness(1)
@@ -34,7 +42,7 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         self.geometry("1100x700")
         self.minsize(1100, 700)
 
-        self.engine = PdfEngine()
+        self.engine = LazyPdfEngine()
         self.page_widgets = []
         self.drag_start_index = None
         self.drag_target_index = None
@@ -45,9 +53,9 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         self.max_columns = 1
         self.ui_font = ("Pretendard", 14)
         self.icon_font = ("Pretendard", 20)
-        self.undo_stack = []
-        self.redo_stack = []
+        self.history = UndoHistory.from_environment()
         self.current_path = None
+        self.save_profile_var = ctk.StringVar(value=SAVE_PROFILE_LABELS[DEFAULT_SAVE_PROFILE])
         self.selected_indices = set()
         self.selected_fg = "#2A364A"
         self.selected_border = "#1f6aa5"
@@ -59,9 +67,23 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         self._last_selected_index = None
         self._external_drag_requested = False
         self.dnd_temp_files = []
+        self.page_clipboard = None
+        self.page_clipboard_file = None
+        self.clipboard_generation = 0
+        self.history.attach(self.engine)
+        self.journal = RecoveryJournal()
+        self.journal.attach(self.engine)
+        self.journal_interval = 1000
         self.handlers = PdfEventHandlers(self)
         self.dnd = DndManager(self)
+        self.renderer = RenderService(self)
+        self.saver = SaveService(self)
+        self.thumbnail_cache = ThumbnailCache()
+        self.thumbnail_store = ThumbnailStore.from_environment()
+        self.thumbnails = ThumbnailPanel(self)
+        self.viewer = PageViewer(self)
         self.ui = UIComponents(self)
+        self.debug_overlay = DebugOverlay(self)
 
         self.grid_rowconfigure(0, weight=0)
         self.grid_rowconfigure(1, weight=1)
@@ -74,6 +96,8 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
             self.dnd_bind("<<Drop>>", self.dnd.on_file_drop)
         self._bind_shortcuts()
         self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(self.journal_interval, self._sync_storage)
+        self.after_idle(self.handlers.offer_recovery)
 
     def _bind_shortcuts(self):
         self.bind_all("<Control-z>", lambda event: self.handlers.undo())
@@ -84,44 +108,15 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         self.bind_all("<Control-c>", lambda event: self.handlers.copy_selected())
         self.bind_all("<Control-v>", lambda event: self.handlers.paste_pages())
         self.bind_all("<Delete>", lambda event: self.handlers.delete_selected())
+        self.bind_all("<Control-Shift-F12>", lambda event: self.debug_overlay.toggle())
 
+    @traced("ui.load_thumbnails")
     def _load_thumbnails(self, keep_selection=False):
         if self.engine.page_count() == 0:
             return
 
         self._clear_thumbnails(keep_selection=keep_selection)
-
-        for page_index in range(self.engine.page_count()):
-            pix = self.engine.get_page_pixmap(page_index, self.thumbnail_scale)
-            if pix is None:
-                continue
-
-            mode = "RGBA" if pix.alpha else "RGB"
-            image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
-            ctk_image = ctk.CTkImage(light_image=image, dark_image=image, size=(pix.width, pix.height))
-
-            frame = ctk.CTkFrame(self.scroll_frame, corner_radius=10)
-            frame.grid(row=page_index, column=0, padx=12, pady=12, sticky="ew")
-            frame.grid_columnconfigure(0, weight=1)
-
-            image_label = ctk.CTkLabel(frame, image=ctk_image, text="")
-            image_label.grid(row=0, column=0, padx=12, pady=(12, 8))
-
-            page_label = ctk.CTkLabel(frame, text=f"페이지 {page_index + 1}", font=self.ui_font)
-            page_label.grid(row=1, column=0, padx=12, pady=(0, 12))
-
-            self._bind_drag_events(frame, image_label, page_label, page_index)
-            default_fg = frame.cget("fg_color")
-            self.page_widgets.append(
-                {
-                    "frame": frame,
-                    "image": ctk_image,
-                    "default_fg": default_fg,
-                    "pil_image": image,
-                    "image_label": image_label,
-                    "page_label": page_label,
-                }
-            )
+        self.thumbnails.reset()
 
         self._refresh_undo_redo()
         self._refresh_selection_styles()
@@ -130,49 +125,40 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
             self.ui.show_page_in_viewer(0)
 
     def _clear_thumbnails(self, keep_selection=False):
-        for item in self.page_widgets:
-            item["frame"].destroy()
-        self.page_widgets.clear()
+        self.thumbnails.clear()
         if not keep_selection:
             self.selected_indices.clear()
         self.dnd.clear_drag_state()
 
     def _refresh_thumbnail(self, page_index):
-        if page_index < 0 or page_index >= len(self.page_widgets):
-            return
-        pix = self.engine.get_page_pixmap(page_index, self.thumbnail_scale)
-        if pix is None:
-            return
-        mode = "RGBA" if pix.alpha else "RGB"
-        image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
-        ctk_image = ctk.CTkImage(light_image=image, dark_image=image, size=(pix.width, pix.height))
-        item = self.page_widgets[page_index]
-        item["image"] = ctk_image
-        item["pil_image"] = image
-        item["image_label"].configure(image=ctk_image, text="")
+        self.thumbnails.refresh_page(page_index)
 
     def _refresh_thumbnails(self, indices):
         for idx in indices:
             self._refresh_thumbnail(idx)
 
-
-    def _register_drag_source(self, widget, page_index):
-        try:
-            widget.drag_source_register(1, DND_FILES)
-            widget.dnd_bind("<<DragInitCmd>>", lambda event, idx=page_index: self.dnd.on_drag_init(event, idx))
-        except Exception:
+    def _register_drag_source(self, widget, cell):
+        if not self._dnd_available:
             return
+        widgets = [widget]
+        for target in widgets:
+            widgets.extend(target.winfo_children())
+            try:
+                target.drag_source_register(1, DND_FILES)
+                target.dnd_bind("<<DragInitCmd>>", lambda event, cell=cell: self.dnd.on_drag_init(event, cell["index"]))
+            except Exception:
+                return
 
-    def _bind_drag_events(self, frame, image_label, page_label, page_index):
-        frame.bind("<Button-1>", lambda event, idx=page_index: self._on_thumbnail_click(event, idx))
+    def _bind_drag_events(self, frame, image_label, page_label, cell):
+        frame.bind("<Button-1>", lambda event, cell=cell: self._on_thumbnail_click(event, cell["index"]))
         frame.bind("<B1-Motion>", self.dnd.on_drag_motion)
         frame.bind("<ButtonRelease-1>", self.dnd.on_drag_release)
 
-        image_label.bind("<Button-1>", lambda event, idx=page_index: self._on_thumbnail_click(event, idx))
+        image_label.bind("<Button-1>", lambda event, cell=cell: self._on_thumbnail_click(event, cell["index"]))
         image_label.bind("<B1-Motion>", self.dnd.on_drag_motion)
         image_label.bind("<ButtonRelease-1>", self.dnd.on_drag_release)
 
-        page_label.bind("<Button-1>", lambda event, idx=page_index: self._on_thumbnail_click(event, idx))
+        page_label.bind("<Button-1>", lambda event, cell=cell: self._on_thumbnail_click(event, cell["index"]))
         page_label.bind("<B1-Motion>", self.dnd.on_drag_motion)
         page_label.bind("<ButtonRelease-1>", self.dnd.on_drag_release)
 
@@ -185,7 +171,7 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         if hasattr(self, "columns_value"):
             self.columns_value.configure(text=str(self.max_columns))
         if self.engine.page_count() > 0:
-            self._load_thumbnails(keep_selection=True)
+            self.thumbnails.relayout()
 
     def _update_scrollregion(self, _event=None):
         if hasattr(self.scroll_frame, "_parent_canvas"):
@@ -194,19 +180,6 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
             if region is not None:
                 canvas.configure(scrollregion=region)
 
-    def _calculate_columns(self, thumb_width):
-        self.update_idletasks()
-        if hasattr(self.scroll_frame, "_parent_canvas"):
-            available = self.scroll_frame._parent_canvas.winfo_width()
-        else:
-            available = self.scroll_frame.winfo_width()
-        if available <= 1:
-            return 4
-        padding = 32
-        columns = int(available // (thumb_width + padding))
-        columns = max(1, columns)
-        return min(columns, self.max_columns)
-
     def _toggle_theme(self):
         if self.theme_switch.get() == 1:
             ctk.set_appearance_mode("dark")
@@ -228,15 +201,65 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         self.info_size.configure(text=f"용량: {size_text}")
         self.info_pages.configure(text=f"페이지 수: {self.engine.page_count()}")
 
+    def _selected_save_profile(self):
+        label = self.save_profile_var.get()
+        for profile, profile_label in SAVE_PROFILE_LABELS.items():
+            if profile_label == label:
+                return profile
+        return DEFAULT_SAVE_PROFILE
+
     def _confirm_discard_if_dirty(self):
         if not self.engine.is_dirty:
             return True
         return messagebox.askyesno("확인", "저장되지 않은 변경사항이 있습니다. 계속하시겠습니까?")
 
+    def _set_status(self, text):
+        if hasattr(self, "info_status"):
+            self.info_status.configure(text=text)
+
+    def _on_first_paint(self):
+        if not self.engine.mark_first_paint():
+            return
+        timings = self.engine.open_timings
+        if not timings.get("repaired"):
+            self._set_status(f"열기 {timings['first_paint']:.2f}초")
+
+    def _sync_storage(self):
+        try:
+            self.journal.sync()
+        except OSError:
+            pass
+        self.thumbnail_store.flush()
+        self.after(self.journal_interval, self._sync_storage)
+
+    def _set_save_status(self, text, fraction):
+        self.save_status_label.configure(text=text)
+        self.save_progress.set(fraction)
+        self.save_status_frame.grid()
+        self.save_btn.configure(state="disabled")
+
+    def _clear_save_status(self):
+        self.save_status_frame.grid_remove()
+        self.save_btn.configure(state="normal")
+
     def _on_close(self):
+        if self.saver.is_running() and not messagebox.askyesno("확인", "저장이 진행 중입니다. 취소하고 종료하시겠습니까?"):
+            return
         if not self._confirm_discard_if_dirty():
             return
+        self.saver.shutdown()
+        self.handlers.release_clipboard()
+        self.dnd.exports.clear()
+        self.renderer.shutdown()
+        self.thumbnail_store.close()
+        self.history.close()
         self.engine.close()
+        self.journal.close()
+        if tracer.export_on_exit and tracer.events:
+            try:
+                tracer.export(stats=self.debug_overlay.stats())
+            except OSError:
+                pass
         for temp_path in list(self.dnd_temp_files):
             try:
                 os.remove(temp_path)
@@ -245,11 +268,9 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         self.destroy()
 
     def _push_undo_state(self):
-        state = self.engine.get_state_bytes()
-        if state is None:
+        if not self.engine.is_open():
             return False
-        self.undo_stack.append(state)
-        self.redo_stack.clear()
+        self.history.begin()
         self._refresh_undo_redo()
         return True
 
@@ -266,6 +287,8 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         max_index = self.engine.page_count() - 1
         self.selected_indices = {i for i in self.selected_indices if 0 <= i <= max_index}
         for idx, item in enumerate(self.page_widgets):
+            if item is None:
+                continue
             self._apply_selection_style(
                 item["frame"],
                 item["default_fg"],
@@ -349,24 +372,24 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
                 ok, err = self.engine.reorder_pages(order)
                 if not ok:
                     if pushed:
-                        self.undo_stack.pop()
+                        self.history.discard()
                         self._refresh_undo_redo()
                     messagebox.showerror("오류", f"페이지 이동에 실패했습니다.\n{err}")
                     return
-                self.selected_indices.clear()
-                self._load_thumbnails()
+                self._apply_page_order(order)
                 return
             pushed = self._push_undo_state()
             ok, err = self.engine.move_page(from_index, target_index)
             if not ok:
                 if pushed:
-                    self.undo_stack.pop()
+                    self.history.discard()
                     self._refresh_undo_redo()
                 messagebox.showerror("오류", f"페이지 이동에 실패했습니다.\n{err}")
                 return
-            self.selected_indices.clear()
+            order = [i for i in range(count) if i != from_index]
+            order.insert(target_index if target_index < from_index else target_index - 1, from_index)
             self._update_file_info()
-            self._load_thumbnails()
+            self._apply_page_order(order)
             return
 
         if target_index in self.selected_indices:
@@ -385,26 +408,40 @@ class PdfEditorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         ok, err = self.engine.reorder_pages(order)
         if not ok:
             if pushed:
-                self.undo_stack.pop()
+                self.history.discard()
                 self._refresh_undo_redo()
             messagebox.showerror("오류", f"페이지 이동에 실패했습니다.\n{err}")
             return
-        self.selected_indices.clear()
         self._update_file_info()
-        self._load_thumbnails()
+        self._apply_page_order(order)
+
+    def _apply_page_order(self, order):
+        viewer_index = self.viewer_page_index
+        self.selected_indices.clear()
+        self.dnd.clear_drag_state()
+        self.thumbnails.apply_order(order)
+        self._refresh_undo_redo()
+        self._refresh_selection_styles()
+        if viewer_index is None:
+            if self.engine.page_count() > 0:
+                self.ui.show_page_in_viewer(0)
+        elif viewer_index in order:
+            self.ui.show_page_in_viewer(order.index(viewer_index), reset_zoom=False)
+        else:
+            self.ui.clear_viewer()
 
     def _refresh_undo_redo(self):
         if not hasattr(self, "undo_btn"):
             return
-        has_doc = self.engine.doc is not None
-        self.undo_btn.configure(state="normal" if has_doc and self.undo_stack else "disabled")
-        self.redo_btn.configure(state="normal" if has_doc and self.redo_stack else "disabled")
+        has_doc = self.engine.is_open()
+        self.undo_btn.configure(state="normal" if has_doc and self.history.can_undo() else "disabled")
+        self.redo_btn.configure(state="normal" if has_doc and self.history.can_redo() else "disabled")
         self._refresh_action_buttons()
 
     def _refresh_action_buttons(self):
         if not hasattr(self, "rotate_left_btn"):
             return
-        has_doc = self.engine.doc is not None
+        has_doc = self.engine.is_open()
         has_selection = bool(self.selected_indices)
         rotate_state = "normal" if has_doc and has_selection else "disabled"
         delete_state = "normal" if has_doc and has_selection else "disabled"
@@ -1,16 +1,28 @@
 ﻿import os
 import re
-import tempfile
-import fitz
 from tkinter import filedialog, messagebox
 
+from pdf_engine import SAVE_PROFILE_LABELS
+from drag_export import export_plan
+from preflight import inspect_pdf, repair_pdf
+from recovery import RecoveryJournal
+from tracing import traced
+
 
 class PdfEventHandlers:
     def __init__(self, app):
         self.app = app
 
+    def _save_in_progress(self):
+        if not self.app.saver.is_running():
+            return False
+        messagebox.showinfo("안내", "저장이 진행 중입니다.")
+        return True
+
     def open_pdf(self, path=None, confirm_discard=True):
         app = self.app
+        if self._save_in_progress():
+            return
         if confirm_discard and not app._confirm_discard_if_dirty():
             return
         if path is None:
@@ -23,9 +35,9 @@ class PdfEventHandlers:
 
         app.engine.close()
         app._clear_thumbnails()
-        app.undo_stack.clear()
-        app.redo_stack.clear()
+        app.history.clear()
         app._refresh_undo_redo()
+        app._set_status("")
 
         ok, err = app.engine.open(path)
         if not ok:
@@ -35,6 +47,50 @@ class PdfEventHandlers:
         app.current_path = path
         app._update_file_info()
         app._load_thumbnails()
+        self._repair_sources()
+
+    def _repair_sources(self):
+        app = self.app
+        tasks = app.engine.repair_tasks()
+        if not tasks:
+            return
+        app._set_status("손상된 PDF 복구 중...")
+        app.renderer.run_batch(repair_pdf, tasks, lambda results: self._on_repaired(tasks, results))
+
+    def _on_repaired(self, tasks, results):
+        app = self.app
+        repaired = [app.engine.adopt_repaired(task, result) for task, result in zip(tasks, results)]
+        if all(repaired):
+            app._set_status(f"복구 완료 ({sum(result[2] for result in results):.1f}초)")
+        else:
+            app._set_status("복구 실패: 원본으로 계속 편집합니다")
+
+    def offer_recovery(self):
+        app = self.app
+        for journal_path in app.journal.orphans():
+            try:
+                session = RecoveryJournal.load(journal_path)
+            except (OSError, ValueError, IndexError):
+                session = None
+            if session is None:
+                RecoveryJournal.remove(journal_path)
+                continue
+            state, operations = session
+            name = os.path.basename(state.get("path") or "") or "제목 없음"
+            if not messagebox.askyesno("복구", f"저장되지 않은 편집 내용이 있습니다.\n{name} 작업을 복구하시겠습니까?"):
+                RecoveryJournal.remove(journal_path)
+                continue
+            app._clear_thumbnails()
+            app.history.clear()
+            ok, err = app.engine.restore_session(state, operations)
+            if not ok:
+                messagebox.showerror("오류", f"복구에 실패했습니다.\n{err}")
+                continue
+            RecoveryJournal.remove(journal_path)
+            app.current_path = state.get("path")
+            app._update_file_info()
+            app._load_thumbnails()
+            return
 
     def merge_pdf(self, path=None):
         app = self.app
@@ -49,83 +105,108 @@ class PdfEventHandlers:
         if not path:
             return
 
+        before = app.engine.page_count()
         pushed = app._push_undo_state()
         ok, err = app.engine.insert_pdf(path)
         if not ok:
             if pushed:
-                app.undo_stack.pop()
+                app.history.discard()
                 app._refresh_undo_redo()
             messagebox.showerror("오류", f"PDF 병합에 실패했습니다.\n{err}")
             return
 
-        app._update_file_info()
-        app._load_thumbnails()
+        self._show_inserted(before, before, False)
 
     def save_all(self):
         app = self.app
         if app.engine.page_count() == 0:
             messagebox.showinfo("안내", "저장할 문서가 없습니다.")
             return
+        if self._save_in_progress():
+            return
 
+        current = app.current_path or ""
         path = filedialog.asksaveasfilename(
             title="전체 저장",
             defaultextension=".pdf",
             filetypes=[("PDF files", "*.pdf")],
+            initialdir=os.path.dirname(current) or None,
+            initialfile=os.path.basename(current) or None,
         )
         if not path:
             return
 
-        ok, err = app.engine.save(path)
+        app._set_save_status("저장 중...", 0)
+        app.saver.start(
+            path,
+            app._selected_save_profile(),
+            lambda fraction: app._set_save_status(f"저장 중... {fraction:.0%}", fraction),
+            lambda ok, err: self._on_saved(path, ok, err),
+        )
+
+    def _on_saved(self, path, ok, err):
+        app = self.app
+        app._clear_save_status()
         if not ok:
             messagebox.showerror("오류", f"저장에 실패했습니다.\n{err}")
             return
 
         app.current_path = path
         app._update_file_info()
-        messagebox.showinfo("완료", "저장이 완료되었습니다.")
+        report = app.engine.save_report
+        messagebox.showinfo(
+            "완료",
+            "저장이 완료되었습니다.\n"
+            f"프로필: {SAVE_PROFILE_LABELS[report['profile']]}"
+            f"{' (증분 저장)' if report['incremental'] else ''}\n"
+            f"용량: {report['before_bytes'] / 1024:.1f} KB → {report['after_bytes'] / 1024:.1f} KB\n"
+            f"소요 시간: {report['seconds']:.2f}초",
+        )
+
+    def cancel_save(self):
+        app = self.app
+        if not app.saver.is_running():
+            return
+        app.saver.cancel()
+        app._clear_save_status()
 
     def reset(self):
         app = self.app
+        if self._save_in_progress():
+            return
         if not app._confirm_discard_if_dirty():
             return
         app.engine.close()
         app._clear_thumbnails()
-        app.undo_stack.clear()
-        app.redo_stack.clear()
+        app.history.clear()
         app.current_path = None
         app._update_file_info()
         app._refresh_undo_redo()
 
+    @traced("ui.undo")
     def undo(self):
         app = self.app
-        if not app.undo_stack or app.engine.doc is None:
+        if not app.history.can_undo() or not app.engine.is_open():
             return
-        current = app.engine.get_state_bytes()
-        state = app.undo_stack.pop()
-        ok, err = app.engine.load_state_bytes(state, mark_dirty=True)
+        ok, err = app.history.undo()
         if not ok:
             messagebox.showerror("오류", f"Undo 실패했습니다.\n{err}")
-            return
-        if current is not None:
-            app.redo_stack.append(current)
         app._refresh_undo_redo()
         app.selected_indices.clear()
+        app._update_file_info()
         app._load_thumbnails()
 
+    @traced("ui.redo")
     def redo(self):
         app = self.app
-        if not app.redo_stack or app.engine.doc is None:
+        if not app.history.can_redo() or not app.engine.is_open():
             return
-        current = app.engine.get_state_bytes()
-        state = app.redo_stack.pop()
-        ok, err = app.engine.load_state_bytes(state, mark_dirty=True)
+        ok, err = app.history.redo()
         if not ok:
             messagebox.showerror("오류", f"Redo 실패했습니다.\n{err}")
-            return
-        if current is not None:
-            app.undo_stack.append(current)
         app._refresh_undo_redo()
         app.selected_indices.clear()
+        app._update_file_info()
         app._load_thumbnails()
 
     def delete_page(self, page_index):
@@ -134,7 +215,7 @@ class PdfEventHandlers:
         ok, err = app.engine.delete_page(page_index)
         if not ok:
             if pushed:
-                app.undo_stack.pop()
+                app.history.discard()
                 app._refresh_undo_redo()
             messagebox.showerror("오류", f"페이지 삭제에 실패했습니다.\n{err}")
             return
@@ -146,7 +227,7 @@ class PdfEventHandlers:
         ok, err = app.engine.rotate_page_by(page_index, 90)
         if not ok:
             if pushed:
-                app.undo_stack.pop()
+                app.history.discard()
                 app._refresh_undo_redo()
             messagebox.showerror("오류", f"페이지 회전에 실패했습니다.\n{err}")
             return
@@ -161,7 +242,7 @@ class PdfEventHandlers:
             ok, err = app.engine.rotate_page_by(idx, delta)
             if not ok:
                 if pushed:
-                    app.undo_stack.pop()
+                    app.history.discard()
                     app._refresh_undo_redo()
                 messagebox.showerror("오류", f"페이지 회전에 실패했습니다.\n{err}")
                 return
@@ -174,14 +255,15 @@ class PdfEventHandlers:
         app = self.app
         if not app.selected_indices:
             return
-        pushed = app._push_undo_state()
         count = app.engine.page_count()
         remaining = [i for i in range(count) if i not in app.selected_indices]
+        if not remaining and self._save_in_progress():
+            return
+        pushed = app._push_undo_state()
         if not remaining:
             app.engine.close()
             app._clear_thumbnails()
-            app.undo_stack.clear()
-            app.redo_stack.clear()
+            app.history.clear()
             app.selected_indices.clear()
             app._update_file_info()
             app._refresh_undo_redo()
@@ -191,48 +273,155 @@ class PdfEventHandlers:
         ok, err = app.engine.keep_pages(remaining)
         if not ok:
             if pushed:
-                app.undo_stack.pop()
+                app.history.discard()
                 app._refresh_undo_redo()
             messagebox.showerror("오류", f"페이지 삭제에 실패했습니다.\n{err}")
             return
-        app.selected_indices.clear()
         app._update_file_info()
-        app._load_thumbnails()
+        app._apply_page_order(remaining)
 
-    def insert_pdf_at(self, path, index):
+    def insert_files(self, paths, index=None, select_new=False):
         app = self.app
+        paths = list(paths)
+        app.renderer.run_batch(
+            inspect_pdf,
+            paths,
+            lambda reports: self._insert_checked_files(paths, reports, index, select_new),
+        )
+
+    def _insert_checked_files(self, requested, reports, index, select_new):
+        app = self.app
+        paths = []
+        failures = []
+        for path, report in zip(requested, reports):
+            if report is None:
+                failures.append(f"{os.path.basename(path)}: 파일을 검사하지 못했습니다.")
+            elif report["ok"]:
+                paths.append(report["path"])
+            else:
+                failures.append(f"{os.path.basename(report['path'])}: {report['error']}")
+        if failures:
+            messagebox.showerror("오류", "일부 PDF를 추가할 수 없습니다.\n" + "\n".join(failures))
+        if not paths:
+            return
+
         if app.engine.page_count() == 0:
-            return self.open_pdf(path)
-        ok, err = app.engine.insert_pdf_at(path, index)
+            self.open_pdf(paths[0], confirm_discard=False)
+            paths = paths[1:]
+            index = None
+            if not paths or app.engine.page_count() == 0:
+                return
+
+        before = app.engine.page_count()
+        index = before if index is None else max(0, min(index, before))
+        pushed = app._push_undo_state()
+        ok, err = app.engine.insert_pdfs_at(paths, index)
         if not ok:
+            if pushed:
+                app.history.discard()
+                app._refresh_undo_redo()
             messagebox.showerror("오류", f"PDF 삽입에 실패했습니다.\n{err}")
             return
+        self._repair_sources()
+
+        self._show_inserted(index, before, select_new)
+
+    def _show_inserted(self, index, before, select_new):
+        app = self.app
+        added = app.engine.page_count() - before
         app._update_file_info()
-        app._load_thumbnails()
+        app._apply_page_order(list(range(index)) + [None] * added + list(range(index, before)))
+        if select_new and added:
+            app.selected_indices = set(range(index, index + added))
+            app._last_selected_index = index + added - 1
+            app._refresh_selection_styles()
+            app.ui.show_page_in_viewer(index)
 
     def copy_selected(self):
         app = self.app
         if not app.selected_indices:
             return
-        temp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        temp_path = temp.name
-        temp.close()
+        clip = app.engine.clip_pages(sorted(app.selected_indices))
+        if clip is None:
+            return
+        self.release_clipboard()
+        app.page_clipboard = clip
+        app.clipboard_generation += 1
+        generation = app.clipboard_generation
+        app.clipboard_clear()
+        if self._lazy_clipboard():
+            app.selection_handle(self._render_clipboard, selection="CLIPBOARD")
+            app.selection_own(
+                selection="CLIPBOARD",
+                command=lambda generation=generation: self._on_clipboard_lost(generation),
+            )
+        temp_path = app.dnd.exports.temp_path(f"clipboard-{generation}.pdf")
+        app.renderer.run_batch(
+            export_plan,
+            [(clip, temp_path)],
+            lambda results: self._on_clipboard_exported(generation, temp_path, results[0]),
+        )
 
-        ok, err = app.engine.export_pages(sorted(app.selected_indices), temp_path)
-        if not ok:
+    def _on_clipboard_exported(self, generation, path, result):
+        app = self.app
+        if generation != app.clipboard_generation or app.page_clipboard is None:
+            return
+        if result is None or not result[0]:
+            return
+        app.page_clipboard_file = path
+        if self._lazy_clipboard():
+            return
+        if self._clipboard_text():
+            self.release_clipboard()
+            return
+        app.clipboard_clear()
+        app.clipboard_append(path)
+
+    def _lazy_clipboard(self):
+        return self.app.tk.call("tk", "windowingsystem") == "x11"
+
+    def _clipboard_text(self):
+        try:
+            return self.app.clipboard_get()
+        except Exception:
+            return ""
+
+    def _owns_clipboard(self):
+        app = self.app
+        if self._lazy_clipboard():
+            return True
+        return self._clipboard_text() in ("", app.page_clipboard_file)
+
+    def release_clipboard(self):
+        app = self.app
+        if app.page_clipboard is not None:
+            app.engine.release_clip(app.page_clipboard)
+        if app.page_clipboard_file is not None:
             try:
-                os.remove(temp_path)
+                os.remove(app.page_clipboard_file)
             except OSError:
                 pass
-            messagebox.showerror("Error", f"Copy failed.\n{err}")
-            return
+        app.page_clipboard = None
+        app.page_clipboard_file = None
 
-        app.clipboard_clear()
-        app.clipboard_append(temp_path)
-        app.dnd_temp_files.append(temp_path)
+    def _on_clipboard_lost(self, generation):
+        if generation == self.app.clipboard_generation:
+            self.release_clipboard()
+
+    def _render_clipboard(self, offset, length):
+        path = self.app.page_clipboard_file
+        if not path:
+            return ""
+        offset = int(offset)
+        return path[offset : offset + int(length)]
 
     def paste_pages(self):
         app = self.app
+        if app.page_clipboard is not None and not self._owns_clipboard():
+            self.release_clipboard()
+        if app.page_clipboard is not None and app.engine.page_count() > 0:
+            self._paste_clip(app.page_clipboard)
+            return
         paths = self._parse_clipboard_files()
         if not paths:
             return
@@ -242,32 +431,22 @@ class PdfEventHandlers:
             messagebox.showinfo("Info", "No PDF file in clipboard.")
             return
 
-        if app.engine.page_count() == 0:
-            self.open_pdf(pdfs[0], confirm_discard=False)
-            for path in pdfs[1:]:
-                self.merge_pdf(path)
-            return
-
-        app._push_undo_state()
         insert_at = max(app.selected_indices) + 1 if app.selected_indices else app.engine.page_count()
-        new_indices = []
-        for path in pdfs:
-            ok, err = app.engine.insert_pdf_at(path, insert_at)
-            if not ok:
-                messagebox.showerror("Error", f"Paste failed.\n{err}")
-                break
-            count = self._count_pages_in_pdf(path)
-            if count:
-                new_indices.extend(range(insert_at, insert_at + count))
-                insert_at += count
+        self.insert_files(pdfs, insert_at, select_new=True)
 
-        app._update_file_info()
-        app._load_thumbnails()
-        if new_indices:
-            app.selected_indices = set(new_indices)
-            app._last_selected_index = new_indices[-1]
-            app._refresh_selection_styles()
-            app.ui.show_page_in_viewer(new_indices[0])
+    def _paste_clip(self, clip):
+        app = self.app
+        before = app.engine.page_count()
+        index = max(app.selected_indices) + 1 if app.selected_indices else before
+        pushed = app._push_undo_state()
+        ok, err = app.engine.paste_clip(clip, index)
+        if not ok:
+            if pushed:
+                app.history.discard()
+                app._refresh_undo_redo()
+            messagebox.showerror("오류", f"붙여넣기에 실패했습니다.\n{err}")
+            return
+        self._show_inserted(index, before, True)
 
     def _parse_clipboard_files(self):
         app = self.app
@@ -280,13 +459,3 @@ class PdfEventHandlers:
         if "{" in text and "}" in text:
             return [item.strip() for item in re.findall(r"\{([^}]*)\}", text) if item.strip()]
         return [line.strip() for line in text.replace("\r", "").split("\n") if line.strip()]
-
-    def _count_pages_in_pdf(self, path):
-        try:
-            doc = fitz.open(path)
-            try:
-                return len(doc)
-            finally:
-                doc.close()
-        except Exception:
-            return 0
@@ -0,0 +1,260 @@
+import hashlib
+import os
+import sys
+import tempfile
+import zlib
+
+from tracing import traced
+
+
+class HistoryBlob:
+    __slots__ = ("digest", "size", "data", "compressed", "offset", "length", "refs")
+
+    def __init__(self, digest, size, data, compressed):
+        self.digest = digest
+        self.size = size
+        self.data = data
+        self.compressed = compressed
+        self.offset = None
+        self.length = len(data)
+        self.refs = 0
+
+
+def _op_bytes(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_op_bytes(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_op_bytes(key) + _op_bytes(item) for key, item in value.items())
+    return size
+
+
+class UndoHistory:
+    compact_slack = 8 * 1024 * 1024
+
+
+    def __init__(self, memory_budget=256 * 1024 * 1024, max_depth=200, compress_level=6, spill_dir=None):
+        self.engine = None
+        self.undo_stack = []
+        self.redo_stack = []
+        self.current = None
+        self.memory_budget = memory_budget
+        self.max_depth = max_depth
+        self.compress_level = compress_level
+        self.spill_dir = spill_dir
+        self.blobs = {}
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.spill_bytes = 0
+        self.log_bytes = 0
+        self._spill_file = None
+        self._replay_target = None
+
+    @classmethod
+    def from_environment(cls):
+        options = {}
+        try:
+            options["memory_budget"] = int(os.environ["PDF_EDITOR_UNDO_BUDGET_MB"]) * 1024 * 1024
+        except (KeyError, ValueError):
+            pass
+        try:
+            options["max_depth"] = max(1, int(os.environ["PDF_EDITOR_UNDO_DEPTH"]))
+        except (KeyError, ValueError):
+            pass
+        return cls(**options)
+
+    def attach(self, engine):
+        self.engine = engine
+        engine.recorder = self
+
+    def record(self, name, *args):
+        args = tuple(self._store_blob(arg) if isinstance(arg, (bytes, bytearray)) else arg for arg in args)
+        self.log_bytes += _op_bytes(args)
+        if self._replay_target is not None:
+            self._replay_target.append((name, args))
+        else:
+            if self.current is None:
+                self.begin()
+            self.current.append((name, args))
+        self._enforce_budget()
+
+    def begin(self):
+        self._clear_stack(self.redo_stack)
+        if self.current is not None and not self.current and self.undo_stack and self.undo_stack[-1] is self.current:
+            return True
+        self.current = []
+        self.undo_stack.append(self.current)
+        while len(self.undo_stack) > self.max_depth:
+            self._release_entry(self.undo_stack.pop(0))
+        return True
+
+    def discard(self):
+        entry = self.current
+        self.current = None
+        if entry is None:
+            return True, ""
+        if self.undo_stack and self.undo_stack[-1] is entry:
+            self.undo_stack.pop()
+        inverse = []
+        ok, err = self._replay(entry, inverse)
+        self._release_entry(entry)
+        self._release_entry(inverse)
+        if not ok:
+            self.clear()
+        return ok, err
+
+    def clear(self):
+        self._clear_stack(self.undo_stack)
+        self._clear_stack(self.redo_stack)
+        self.current = None
+        self._enforce_budget()
+
+    def close(self):
+        self.clear()
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+            self.spill_bytes = 0
+
+    def footprint(self):
+        return {
+            "undo_entries": len(self.undo_stack),
+            "redo_entries": len(self.redo_stack),
+            "blobs": len(self.blobs),
+            "raw_bytes": sum(blob.size for blob in self.blobs.values()),
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes,
+            "spill_file_bytes": self.spill_bytes,
+            "log_bytes": self.log_bytes,
+            "memory_budget": self.memory_budget,
+            "max_depth": self.max_depth,
+        }
+
+    def can_undo(self):
+        return any(self.undo_stack)
+
+    def can_redo(self):
+        return any(self.redo_stack)
+
+    @traced("history.undo")
+    def undo(self):
+        return self._step(self.undo_stack, self.redo_stack)
+
+    @traced("history.redo")
+    def redo(self):
+        return self._step(self.redo_stack, self.undo_stack)
+
+    def _step(self, source, target):
+        self.current = None
+        while source and not source[-1]:
+            source.pop()
+        if not source:
+            return False, "기록이 없습니다."
+        entry = source.pop()
+        inverse = []
+        ok, err = self._replay(entry, inverse)
+        self._release_entry(entry)
+        if not ok:
+            self._release_entry(inverse)
+            self.clear()
+            return False, err
+        target.append(inverse)
+        return True, ""
+
+    @traced("history.replay")
+    def _replay(self, entry, inverse):
+        self._replay_target = inverse
+        try:
+            for name, args in reversed(entry):
+                args = tuple(self._load_blob(arg) if isinstance(arg, HistoryBlob) else arg for arg in args)
+                ok, err = getattr(self.engine, name)(*args)
+                if not ok:
+                    return False, err
+        finally:
+            self._replay_target = None
+        return True, ""
+
+    def _clear_stack(self, stack):
+        for entry in stack:
+            self._release_entry(entry)
+        stack.clear()
+
+    @traced("history.store_blob")
+    def _store_blob(self, data):
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        blob = self.blobs.get(digest)
+        if blob is None:
+            packed = zlib.compress(data, self.compress_level) if self.compress_level else data
+            if len(packed) < len(data):
+                blob = HistoryBlob(digest, len(data), packed, True)
+            else:
+                blob = HistoryBlob(digest, len(data), bytes(data), False)
+            self.blobs[digest] = blob
+            self.memory_bytes += blob.length
+        blob.refs += 1
+        return blob
+
+    def _load_blob(self, blob):
+        data = blob.data
+        if data is None:
+            self._spill_file.seek(blob.offset)
+            data = self._spill_file.read(blob.length)
+        return zlib.decompress(data) if blob.compressed else data
+
+    def _release_entry(self, entry):
+        for _name, args in entry:
+            self.log_bytes -= _op_bytes(args)
+            for arg in args:
+                if isinstance(arg, HistoryBlob):
+                    self._release_blob(arg)
+
+    def _release_blob(self, blob):
+        blob.refs -= 1
+        if blob.refs > 0:
+            return
+        del self.blobs[blob.digest]
+        if blob.data is not None:
+            self.memory_bytes -= blob.length
+        else:
+            self.disk_bytes -= blob.length
+
+    def _enforce_budget(self):
+        if self.memory_bytes > self.memory_budget:
+            for blob in list(self.blobs.values()):
+                if self.memory_bytes <= self.memory_budget:
+                    break
+                if blob.data is not None:
+                    self._spill(blob)
+        while self.log_bytes > self.memory_budget and len(self.undo_stack) > 1:
+            self._release_entry(self.undo_stack.pop(0))
+        if self._spill_file is None:
+            return
+        if self.disk_bytes == 0:
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
+            self.spill_bytes = 0
+        elif self.spill_bytes - self.disk_bytes > max(self.disk_bytes, self.compact_slack):
+            self._compact_spill()
+
+    def _compact_spill(self):
+        spill = tempfile.TemporaryFile(prefix="pdf_edit_undo_", dir=self.spill_dir)
+        for blob in self.blobs.values():
+            if blob.data is None:
+                self._spill_file.seek(blob.offset)
+                data = self._spill_file.read(blob.length)
+                blob.offset = spill.tell()
+                spill.write(data)
+        self._spill_file.close()
+        self._spill_file = spill
+        self.spill_bytes = spill.tell()
+
+    def _spill(self, blob):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="pdf_edit_undo_", dir=self.spill_dir)
+        self._spill_file.seek(0, 2)
+        blob.offset = self._spill_file.tell()
+        self._spill_file.write(blob.data)
+        self.spill_bytes = blob.offset + blob.length
+        blob.data = None
+        self.memory_bytes -= blob.length
+        self.disk_bytes += blob.length
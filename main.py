@@ -1,7 +1,15 @@
-from editor_ui import PdfEditorApp
+import multiprocessing
+import sys
+
+import batch_cli
 
 
 def main():
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] in batch_cli.COMMANDS:
+        sys.exit(batch_cli.main(sys.argv[1:]))
+    from editor_ui import PdfEditorApp
+
     app = PdfEditorApp()
     app.mainloop()
 
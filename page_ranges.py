@@ -0,0 +1,42 @@
+import re
+
+_RANGE = re.compile(r"^(\d+|end)?\s*-\s*(\d+|end)?$")
+_SINGLE = re.compile(r"^(\d+|end)$")
+
+
+def _bound(token, page_count, default):
+    if token is None:
+        return default
+    if token == "end":
+        return page_count
+    return int(token)
+
+
+def parse_page_ranges(expression, page_count):
+    indices = []
+    for item in str(expression).lower().split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item in ("all", "*"):
+            indices.extend(range(page_count))
+            continue
+        if item in ("odd", "even"):
+            indices.extend(range(0 if item == "odd" else 1, page_count, 2))
+            continue
+        single = _SINGLE.match(item)
+        match = _RANGE.match(item)
+        if single:
+            start = end = _bound(single.group(1), page_count, None)
+        elif match and (match.group(1) or match.group(2)):
+            start = _bound(match.group(1), page_count, 1)
+            end = _bound(match.group(2), page_count, page_count)
+        else:
+            raise ValueError(f"유효하지 않은 페이지 범위입니다: {item}")
+        if not (1 <= start <= page_count and 1 <= end <= page_count):
+            raise ValueError(f"페이지 범위를 벗어났습니다: {item}")
+        step = 1 if end >= start else -1
+        indices.extend(range(start - 1, end - 1 + step, step))
+    if not indices:
+        raise ValueError("선택된 페이지가 없습니다.")
+    return indices
@@ -0,0 +1,389 @@
+import math
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+from thumbnail_cache import ThumbnailCache
+
+
+class PageViewer:
+    tile_size = 512
+    min_zoom = 0.2
+    max_zoom = 16.0
+    max_pages = 8
+    zoom_delay = 150
+    prefetch_delay = 250
+    prefetch_pages = 4
+    prefetch_bytes = 32 * 1024 * 1024
+
+    def __init__(self, app):
+        self.app = app
+        self.canvas = None
+        self.hbar = None
+        self.vbar = None
+        self.page_index = None
+        self.page_key = None
+        self.scale = None
+        self.fit_scale = None
+        self.size = (0, 0)
+        self.preview = None
+        self.tiles = {}
+        self.requests = {}
+        self.cache = ThumbnailCache(max_bytes=64 * 1024 * 1024)
+        self.recent_pages = OrderedDict()
+        self.prefetched = OrderedDict()
+        self.prefetch_requests = {}
+        self._refresh_job = None
+        self._zoom_job = None
+        self._prefetch_job = None
+
+    def attach(self, canvas, hbar, vbar):
+        self.canvas = canvas
+        self.hbar = hbar
+        self.vbar = vbar
+        canvas.configure(xscrollcommand=self._on_xscroll, yscrollcommand=self._on_yscroll)
+        canvas.bind("<Configure>", lambda _event: self.schedule_refresh(), add="+")
+
+    def _on_xscroll(self, first, last):
+        self.hbar.set(first, last)
+        self.schedule_refresh()
+
+    def _on_yscroll(self, first, last):
+        self.vbar.set(first, last)
+        self.schedule_refresh()
+
+    def clamp_zoom(self, zoom):
+        return max(self.min_zoom, min(zoom, self.max_zoom))
+
+    def clear(self):
+        self._cancel_zoom()
+        self._cancel_prefetch()
+        self._clear_preview()
+        self._drop_tiles()
+        self.cache.clear()
+        self.recent_pages.clear()
+        self.prefetched.clear()
+        self.page_index = None
+        self.page_key = None
+        self.scale = None
+        self.fit_scale = None
+        self.size = (0, 0)
+
+    def show(self, index, zoom):
+        engine = self.app.engine
+        width, height = engine.page_size(index)
+        if width <= 0 or height <= 0:
+            return
+        fit_scale = self._fit_scale(width, height)
+        scale = round(fit_scale * self.clamp_zoom(zoom), 4)
+
+        self._cancel_zoom()
+        page_key = (engine.page_fingerprint(index), engine.page_rotation(index))
+        if page_key != self.page_key:
+            self._remember_page(page_key)
+        if index != self.page_index or page_key != self.page_key:
+            self._clear_preview()
+        if index != self.page_index or page_key != self.page_key or scale != self.scale:
+            self._drop_tiles()
+        self.page_index = index
+        self.page_key = page_key
+        self.scale = scale
+        self.fit_scale = fit_scale
+        self.size = self._scaled_size(width, height, scale)
+        self.canvas.config(scrollregion=(0, 0, self.size[0], self.size[1]))
+        self._cancel_prefetch()
+        self.refresh()
+
+    def _fit_scale(self, width, height):
+        available_w = max(1, self.canvas.winfo_width() - 24)
+        available_h = max(1, self.canvas.winfo_height() - 24)
+        return max(0.2, min(available_w / width, available_h / height, 2.0))
+
+    def _scaled_size(self, width, height, scale):
+        return max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale))
+
+    def zoom_to(self, zoom, anchor=(0, 0)):
+        if self.page_index is None or self.fit_scale is None:
+            return
+        scale = round(self.fit_scale * self.clamp_zoom(zoom), 4)
+        if scale == self.scale:
+            return
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        if self.preview is None:
+            self._capture_preview(left, top)
+        ratio = scale / self.scale
+        width, height = self.app.engine.page_size(self.page_index)
+        self._drop_tiles()
+        self._cancel_prefetch()
+        self.scale = scale
+        self.size = self._scaled_size(width, height, scale)
+        if self._zoom_job is not None:
+            self.app.after_cancel(self._zoom_job)
+        self._zoom_job = self.app.after(self.zoom_delay, self._commit_zoom)
+        self.canvas.config(scrollregion=(0, 0, self.size[0], self.size[1]))
+        self.canvas.xview_moveto(max(0.0, (left + anchor[0]) * ratio - anchor[0]) / self.size[0])
+        self.canvas.yview_moveto(max(0.0, (top + anchor[1]) * ratio - anchor[1]) / self.size[1])
+        self._draw_preview()
+
+    def _commit_zoom(self):
+        self._zoom_job = None
+        self.refresh()
+
+    def _cancel_zoom(self):
+        if self._zoom_job is not None:
+            self.app.after_cancel(self._zoom_job)
+            self._zoom_job = None
+
+    def _capture_preview(self, left, top):
+        right = min(self.size[0], left + self.canvas.winfo_width())
+        bottom = min(self.size[1], top + self.canvas.winfo_height())
+        left = max(0, int(left))
+        top = max(0, int(top))
+        if not self.tiles or right <= left or bottom <= top:
+            return
+        image = Image.new("RGB", (int(right) - left, int(bottom) - top), "white")
+        for tile, entry in self.tiles.items():
+            x0, y0, _x1, _y1 = self._tile_clip(tile)
+            image.paste(entry["image"], (x0 - left, y0 - top))
+        self.preview = {"image": image, "scale": self.scale, "origin": (left, top), "item": None, "photo": None}
+
+    def _draw_preview(self):
+        preview = self.preview
+        if preview is None:
+            return
+        ratio = self.scale / preview["scale"]
+        source_w, source_h = preview["image"].size
+        origin_x, origin_y = preview["origin"]
+        region = (
+            origin_x * ratio,
+            origin_y * ratio,
+            (origin_x + source_w) * ratio,
+            (origin_y + source_h) * ratio,
+        )
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        x0 = max(region[0], left)
+        y0 = max(region[1], top)
+        x1 = min(region[2], left + self.canvas.winfo_width())
+        y1 = min(region[3], top + self.canvas.winfo_height())
+        if x1 - x0 < 1 or y1 - y0 < 1:
+            self._clear_preview(keep_source=True)
+            return
+        box = (
+            (x0 - region[0]) / ratio,
+            (y0 - region[1]) / ratio,
+            (x1 - region[0]) / ratio,
+            (y1 - region[1]) / ratio,
+        )
+        image = preview["image"].resize((int(x1 - x0), int(y1 - y0)), Image.BILINEAR, box=box)
+        photo = ImageTk.PhotoImage(image)
+        if preview["item"] is None:
+            preview["item"] = self.canvas.create_image(x0, y0, anchor="nw", image=photo)
+        else:
+            self.canvas.coords(preview["item"], x0, y0)
+            self.canvas.itemconfigure(preview["item"], image=photo)
+        preview["photo"] = photo
+
+    def _clear_preview(self, keep_source=False):
+        preview = self.preview
+        if preview is None:
+            return
+        if preview["item"] is not None:
+            self.canvas.delete(preview["item"])
+            preview["item"] = None
+            preview["photo"] = None
+        if not keep_source:
+            self.preview = None
+
+    def _remember_page(self, page_key):
+        self.prefetched.pop(page_key, None)
+        self.recent_pages.pop(page_key, None)
+        self.recent_pages[page_key] = True
+        while len(self.recent_pages) > self.max_pages:
+            stale, _ = self.recent_pages.popitem(last=False)
+            if stale not in self.prefetched:
+                self.cache.discard(lambda key: key[0] == stale)
+
+    def _remember_prefetch(self, page_key):
+        if page_key in self.recent_pages:
+            return
+        self.prefetched.pop(page_key, None)
+        self.prefetched[page_key] = True
+        while len(self.prefetched) > self.prefetch_pages:
+            stale, _ = self.prefetched.popitem(last=False)
+            self.cache.discard(lambda key: key[0] == stale)
+
+    def _settled(self):
+        if self.requests:
+            return
+        self._clear_preview()
+        if self._prefetch_job is None and not self.prefetch_requests:
+            self._prefetch_job = self.app.after(self.prefetch_delay, self._prefetch)
+
+    def _cancel_prefetch(self):
+        if self._prefetch_job is not None:
+            self.app.after_cancel(self._prefetch_job)
+            self._prefetch_job = None
+        for task, callback in self.prefetch_requests.items():
+            self.app.renderer.cancel(task, callback)
+        self.prefetch_requests.clear()
+
+    def _prefetch_candidates(self):
+        index = self.page_index
+        order = [index + 1, index - 1, index + 2]
+        for selected in sorted(self.app.selected_indices, key=lambda i: abs(i - index)):
+            order += [selected, selected + 1, selected - 1]
+        count = self.app.engine.page_count()
+        candidates = []
+        for candidate in order:
+            if 0 <= candidate < count and candidate != index and candidate not in candidates:
+                candidates.append(candidate)
+        return candidates[: self.prefetch_pages]
+
+    def _prefetch(self):
+        self._prefetch_job = None
+        if self.page_index is None or self.requests or self._zoom_job is not None:
+            return
+        engine = self.app.engine
+        revision = engine.revision
+        budget = self.prefetch_bytes
+        for index in self._prefetch_candidates():
+            width, height = engine.page_size(index)
+            if width <= 0 or height <= 0:
+                continue
+            scale = round(self._fit_scale(width, height), 4)
+            size = self._scaled_size(width, height, scale)
+            budget -= size[0] * size[1] * 3
+            if budget < 0:
+                break
+            page_key = (engine.page_fingerprint(index), engine.page_rotation(index))
+            self._remember_prefetch(page_key)
+            first_col, first_row, last_col, last_row = self._tile_range(size, 0, 0)
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    key = (page_key, scale, col, row)
+                    if key in self.cache:
+                        continue
+                    task = engine.render_task(index, scale, self._tile_clip((col, row), size))
+                    if task is None or task in self.prefetch_requests:
+                        continue
+                    callback = lambda result, task=task, key=key: self._on_prefetched(task, key, revision, result)
+                    self.prefetch_requests[task] = callback
+                    self.app.renderer.request(task, callback, (2, len(self.prefetch_requests)))
+
+    def _on_prefetched(self, task, key, revision, result):
+        if self.prefetch_requests.pop(task, None) is None:
+            return
+        if result is None or revision != self.app.engine.revision:
+            return
+        if key[0] not in self.prefetched and key[0] not in self.recent_pages:
+            return
+        mode, width, height, samples = result
+        self.cache.put(key, Image.frombytes(mode, (width, height), samples))
+
+    def schedule_refresh(self):
+        if self._refresh_job is None:
+            self._refresh_job = self.app.after_idle(self.refresh)
+
+    def refresh(self):
+        if self._refresh_job is not None:
+            self.app.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        if self.page_index is None or self.canvas is None or self._zoom_job is not None:
+            return
+        size = self.tile_size
+        columns = (self.size[0] + size - 1) // size
+        rows = (self.size[1] + size - 1) // size
+        first_col, first_row, last_col, last_row = self._tile_range(
+            self.size, self.canvas.canvasx(0), self.canvas.canvasy(0)
+        )
+        center_col = (first_col + last_col) / 2
+        center_row = (first_row + last_row) / 2
+
+        wanted = {}
+        for row in range(max(0, first_row - 1), min(rows, last_row + 2)):
+            for col in range(max(0, first_col - 1), min(columns, last_col + 2)):
+                visible = first_row <= row <= last_row and first_col <= col <= last_col
+                distance = abs(row - center_row) + abs(col - center_col)
+                wanted[(col, row)] = (-2 if visible else -1, distance)
+
+        for tile in list(self.tiles):
+            if tile not in wanted:
+                self.canvas.delete(self.tiles.pop(tile)["item"])
+        for tile in list(self.requests):
+            if tile not in wanted:
+                self._cancel_request(tile)
+        for tile, priority in sorted(wanted.items(), key=lambda item: item[1]):
+            if tile in self.tiles or tile in self.requests:
+                continue
+            image = self.cache.get(self._tile_key(tile))
+            if image is not None:
+                self._show_tile(tile, image)
+            else:
+                self._request_tile(tile, priority)
+        self._settled()
+
+    def _tile_range(self, size, left, top):
+        tile = self.tile_size
+        columns = (size[0] + tile - 1) // tile
+        rows = (size[1] + tile - 1) // tile
+        return (
+            max(0, int(left // tile)),
+            max(0, int(top // tile)),
+            min(columns - 1, int((left + self.canvas.winfo_width()) // tile)),
+            min(rows - 1, int((top + self.canvas.winfo_height()) // tile)),
+        )
+
+    def _tile_key(self, tile):
+        return self.page_key, self.scale, tile[0], tile[1]
+
+    def _tile_clip(self, tile, size=None):
+        size = size or self.size
+        col, row = tile
+        return (
+            col * self.tile_size,
+            row * self.tile_size,
+            min((col + 1) * self.tile_size, size[0]),
+            min((row + 1) * self.tile_size, size[1]),
+        )
+
+    def _request_tile(self, tile, priority):
+        task = self.app.engine.render_task(self.page_index, self.scale, self._tile_clip(tile))
+        if task is None:
+            return
+        key = self._tile_key(tile)
+        callback = lambda result, tile=tile, task=task, key=key: self._on_rendered(tile, task, key, result)
+        self.requests[tile] = (task, callback)
+        self.app.renderer.request(task, callback, priority)
+
+    def _cancel_request(self, tile):
+        task, callback = self.requests.pop(tile)
+        self.app.renderer.cancel(task, callback)
+
+    def _on_rendered(self, tile, task, key, result):
+        current = self.requests.get(tile)
+        if current is None or current[0] != task:
+            return
+        del self.requests[tile]
+        if result is None:
+            self._settled()
+            return
+        mode, width, height, samples = result
+        image = Image.frombytes(mode, (width, height), samples)
+        self.cache.put(key, image)
+        self._show_tile(tile, image)
+        self._settled()
+
+    def _show_tile(self, tile, image):
+        x0, y0, _x1, _y1 = self._tile_clip(tile)
+        photo = ImageTk.PhotoImage(image)
+        item = self.canvas.create_image(x0, y0, anchor="nw", image=photo)
+        self.tiles[tile] = {"item": item, "photo": photo, "image": image}
+
+    def _drop_tiles(self):
+        for tile in list(self.requests):
+            self._cancel_request(tile)
+        for entry in self.tiles.values():
+            self.canvas.delete(entry["item"])
+        self.tiles.clear()
@@ -1,78 +1,392 @@
+import hashlib
+import os
+import tempfile
+import time
+from collections import namedtuple
+
 import fitz
 
+from tracing import traced
+
+PageRef = namedtuple("PageRef", ["source", "number", "delta"])
+
+DEFAULT_SAVE_PROFILE = "fast"
+SAVE_PROFILES = {
+    "fast": {"garbage": 1},
+    "compact": {"garbage": 4, "deflate": True, "deflate_images": True, "deflate_fonts": True, "use_objstms": 1},
+    "web": {"garbage": 3, "deflate": True, "linear": True},
+}
+INCREMENTAL_PROFILES = ("fast",)
+SAVE_PROFILE_LABELS = {
+    "fast": "빠른 저장",
+    "compact": "용량 최적화",
+    "web": "웹 보기 최적화",
+}
+
+
+def page_runs(indices):
+    runs = []
+    for index in indices:
+        if runs and index == runs[-1][1] + 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return runs
+
+
+def file_token(path):
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def content_token(path, sample=64 * 1024):
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{stat.st_size}|{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as handle:
+        digest.update(handle.read(sample))
+        if stat.st_size > sample:
+            handle.seek(max(sample, stat.st_size - sample))
+            digest.update(handle.read(sample))
+    return digest.hexdigest()
+
+
+def save_options(profile):
+    options = SAVE_PROFILES.get(profile or DEFAULT_SAVE_PROFILE)
+    if options is None:
+        raise ValueError(f"알 수 없는 저장 프로필입니다: {profile}")
+    return dict(options)
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def same_path(first, second):
+    return os.path.normcase(os.path.abspath(first)) == os.path.normcase(os.path.abspath(second))
+
+
+def copy_pages(target, source, indices):
+    runs = page_runs(indices)
+    for number, (start, end) in enumerate(runs):
+        target.insert_pdf(source, from_page=start, to_page=end, final=number == len(runs) - 1)
+
+
+def build_document(plan, open_source, progress=None):
+    pages = plan["pages"]
+    runs = []
+    if plan["direct"]:
+        doc = fitz.open(plan["direct"])
+        numbers = [number for _source_id, number, _rotation in pages]
+        try:
+            if numbers != list(range(len(doc))):
+                doc.select(numbers)
+        except Exception:
+            doc.close()
+            raise
+    else:
+        for source_id, number, _rotation in pages:
+            if runs and runs[-1][0] == source_id and runs[-1][2] + 1 == number:
+                runs[-1][2] = number
+            else:
+                runs.append([source_id, number, number])
+        last_run = {source_id: position for position, (source_id, _start, _end) in enumerate(runs)}
+        doc = fitz.open()
+    try:
+        for position, (source_id, start, end) in enumerate(runs):
+            doc.insert_pdf(open_source(source_id), from_page=start, to_page=end, final=last_run[source_id] == position)
+            if progress is not None:
+                progress(position + 1, len(runs) + 1)
+        for position, (_source_id, _number, rotation) in enumerate(pages):
+            if rotation is not None:
+                page = doc.load_page(position)
+                if page.rotation != rotation:
+                    page.set_rotation(rotation)
+    except Exception:
+        doc.close()
+        raise
+    if progress is not None:
+        progress(len(runs) + 1, len(runs) + 1)
+    return doc
+
 
 class PdfEngine:
     def __init__(self):
         self.doc = None
+        self.path = None
         self.is_dirty = False
+        self.revision = 0
+        self.structure_revision = 0
+        self.save_report = None
+        self._render_snapshot = None
+        self._stale_files = []
+        self._pinned_files = []
+        self._digest_doc = None
+        self._xref_digests = {}
+        self.recorder = None
+        self.journal = None
+        self.open_timings = {}
+        self._open_started = None
 
+    @traced("engine.open")
     def open(self, path):
+        start = time.perf_counter()
         try:
             self.doc = fitz.open(path)
         except Exception as exc:
             return False, str(exc)
+        parsed = time.perf_counter()
+        self._open_started = start
+        self.open_timings = {
+            "parse": parsed - start,
+            "page_tree": 0.0,
+            "first_paint": None,
+            "repaired": bool(self.doc.is_repaired),
+        }
+        page_count = len(self.doc)
+        self.open_timings["page_tree"] = time.perf_counter() - parsed
+        self.open_timings["pages"] = page_count
+        self.path = path
         self.is_dirty = False
+        self.revision += 1
+        self.structure_revision = 0
+        self._discard_render_snapshots()
         return True, ""
 
+    @traced("engine.close")
     def close(self):
         if self.doc is not None:
             try:
                 self.doc.close()
             finally:
                 self.doc = None
+                self.path = None
                 self.is_dirty = False
+                self._touch(structural=True, dirty=False)
+        self._discard_render_snapshots()
+
+    def is_open(self):
+        return self.doc is not None
+
+    def _record(self, name, *args):
+        if self.recorder is not None:
+            self.recorder.record(name, *args)
+
+    def mark_first_paint(self):
+        if self._open_started is None or self.open_timings.get("first_paint") is not None:
+            return False
+        self.open_timings["first_paint"] = time.perf_counter() - self._open_started
+        return True
 
+    def _log(self, name, *args):
+        if self.journal is not None:
+            self.journal.record(name, args)
+
+    def _capture_pages(self, indices):
+        if self.recorder is None:
+            return None
+        side_doc = fitz.open()
+        try:
+            copy_pages(side_doc, self.doc, indices)
+            return side_doc.tobytes()
+        finally:
+            side_doc.close()
+
+    def _touch(self, structural=False, dirty=True):
+        if dirty:
+            self.is_dirty = True
+        self.revision += 1
+        if structural:
+            self.structure_revision += 1
+
+    @traced("engine.get_state_bytes")
     def get_state_bytes(self):
         if not self.doc:
             return None
         return self.doc.tobytes()
 
+    @traced("engine.load_state_bytes")
     def load_state_bytes(self, data, mark_dirty=True):
         if data is None:
             return False, "유효하지 않은 상태 데이터입니다."
+        previous = self.get_state_bytes() if self.recorder is not None else None
         try:
+            doc = fitz.open(stream=data, filetype="pdf")
             if self.doc is not None:
                 self.doc.close()
-            self.doc = fitz.open(stream=data, filetype="pdf")
+            self.doc = doc
         except Exception as exc:
             return False, str(exc)
+        if previous is not None:
+            self._record("load_state_bytes", previous, mark_dirty)
         self.is_dirty = mark_dirty
+        self._touch(structural=True, dirty=False)
         return True, ""
 
     def page_count(self):
         return len(self.doc) if self.doc else 0
 
+    def page_size(self, index):
+        if not self.doc:
+            return 0, 0
+        rect = self.doc.load_page(index).rect
+        return rect.width, rect.height
+
+    @traced("engine.get_page_pixmap")
     def get_page_pixmap(self, index, scale):
         if not self.doc:
             return None
         page = self.doc.load_page(index)
         return page.get_pixmap(matrix=fitz.Matrix(scale, scale))
 
-    def save(self, path):
+    def page_rotation(self, index):
         if not self.doc:
-            return False, "문서가 열려 있지 않습니다."
+            return 0
+        return self.doc.load_page(index).rotation
+
+    def page_fingerprint(self, index):
+        if not self.doc or index < 0 or index >= len(self.doc):
+            return None
+        if self._digest_doc is not self.doc:
+            self._digest_doc = self.doc
+            self._xref_digests = {}
+        page = self.doc.load_page(index)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((tuple(page.mediabox), tuple(page.cropbox))).encode())
+        for xref in page.get_contents():
+            digest.update(self._xref_digest(xref))
+        for item in page.get_images(full=True):
+            digest.update(self._xref_digest(item[0]))
+        for item in page.get_xobjects():
+            digest.update(self._xref_digest(item[0]))
+        for item in page.get_fonts(full=True):
+            digest.update(repr(item[1:5]).encode())
+        for xref in page.annot_xrefs():
+            digest.update(self.doc.xref_object(xref[0], compressed=True).encode())
+        return digest.hexdigest()
+
+    def _xref_digest(self, xref):
+        cached = self._xref_digests.get(xref)
+        if cached is None:
+            digest = hashlib.blake2b(digest_size=16)
+            try:
+                data = self.doc.xref_stream_raw(xref)
+            except Exception:
+                data = None
+            digest.update(data or self.doc.xref_object(xref, compressed=True).encode())
+            cached = digest.digest()
+            self._xref_digests[xref] = cached
+        return cached
+
+    def render_task(self, index, scale, clip=None):
+        if not self.doc or index < 0 or index >= len(self.doc):
+            return None
+        source = self._render_source()
+        if source is None:
+            return None
+        return source, index, self.doc.load_page(index).rotation, round(scale, 4), clip
+
+    def _render_source(self):
+        if self.structure_revision == 0 and self.path and os.path.exists(self.path):
+            return self.path, file_token(self.path)
+        snapshot = self._render_snapshot
+        if snapshot is not None and snapshot[0] == self.structure_revision:
+            return snapshot[1], snapshot[1]
+        fd, path = tempfile.mkstemp(prefix="pdf_edit_render_", suffix=".pdf")
+        os.close(fd)
         try:
             self.doc.save(path)
+        except Exception:
+            self._remove_file(path)
+            return None
+        stale = self._stale_files
+        self._stale_files = []
+        if snapshot is not None:
+            self._stale_files.append(snapshot[1])
+        self._render_snapshot = (self.structure_revision, path)
+        self._stale_files += [p for p in stale if not self._remove_file(p)]
+        return path, path
+
+    def _discard_render_snapshots(self):
+        if self._render_snapshot is not None:
+            self._stale_files.append(self._render_snapshot[1])
+            self._render_snapshot = None
+        self._stale_files = [p for p in self._stale_files if p in self._pinned_files or not self._remove_file(p)]
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        return True
+
+    def input_bytes(self):
+        return file_size(self.path)
+
+    def _report_save(self, profile, path, before, start, incremental=False):
+        self.save_report = {
+            "profile": profile or DEFAULT_SAVE_PROFILE,
+            "incremental": incremental,
+            "seconds": time.perf_counter() - start,
+            "before_bytes": before,
+            "after_bytes": file_size(path),
+        }
+        return self.save_report
+
+    def _can_save_incrementally(self, path, profile):
+        return (
+            (profile or DEFAULT_SAVE_PROFILE) in INCREMENTAL_PROFILES
+            and self.path is not None
+            and same_path(path, self.path)
+            and self.structure_revision == 0
+            and self.doc.can_save_incrementally()
+        )
+
+    @traced("engine.save")
+    def save(self, path, profile=None):
+        if not self.doc:
+            return False, "문서가 열려 있지 않습니다."
+        start = time.perf_counter()
+        before = self.input_bytes()
+        try:
+            incremental = self._can_save_incrementally(path, profile)
+            if incremental:
+                self.doc.saveIncr()
+            else:
+                self.doc.save(path, **save_options(profile))
         except Exception as exc:
             return False, str(exc)
+        self._report_save(profile, path, before, start, incremental)
         self.is_dirty = False
         return True, ""
 
+    @traced("engine.delete_page")
     def delete_page(self, index):
         if not self.doc:
             return False, "문서가 열려 있지 않습니다."
         if index < 0 or index >= len(self.doc):
             return False, "유효하지 않은 페이지입니다."
         try:
+            payload = self._capture_pages([index])
             self.doc.delete_page(index)
         except Exception as exc:
             return False, str(exc)
-        self.is_dirty = True
+        self._record("restore_pages", payload, [index])
+        self._touch(structural=True)
         return True, ""
 
+    @traced("engine.rotate_page")
     def rotate_page(self, index):
         return self.rotate_page_by(index, 90)
 
+    @traced("engine.rotate_page_by")
     def rotate_page_by(self, index, delta):
         if not self.doc:
             return False, "문서가 열려 있지 않습니다."
@@ -83,23 +397,28 @@ class PdfEngine:
             page.set_rotation((page.rotation + delta) % 360)
         except Exception as exc:
             return False, str(exc)
-        self.is_dirty = True
+        self._record("rotate_page_by", index, -delta)
+        self._touch()
         return True, ""
 
+    @traced("engine.move_page")
     def move_page(self, from_index, to_index):
         if not self.doc:
             return False, "문서가 열려 있지 않습니다."
         if from_index < 0 or from_index >= len(self.doc):
             return False, "유효하지 않은 페이지입니다."
-        if to_index < 0 or to_index >= len(self.doc):
+        if to_index < 0 or to_index > len(self.doc):
             return False, "유효하지 않은 페이지입니다."
         try:
-            self.doc.move_page(from_index, to_index)
+            self.doc.move_page(from_index, to_index if to_index < len(self.doc) else -1)
         except Exception as exc:
             return False, str(exc)
-        self.is_dirty = True
+        moved_to = to_index if to_index <= from_index else to_index - 1
+        self._record("move_page", moved_to, from_index if from_index < moved_to else from_index + 1)
+        self._touch(structural=True)
         return True, ""
 
+    @traced("engine.reorder_pages")
     def reorder_pages(self, order):
         if not self.doc:
             return False, "문서가 열려 있지 않습니다."
@@ -108,16 +427,17 @@ class PdfEngine:
         if sorted(order) != list(range(len(self.doc))):
             return False, "유효하지 않은 페이지 순서입니다."
         try:
-            new_doc = fitz.open()
-            for idx in order:
-                new_doc.insert_pdf(self.doc, from_page=idx, to_page=idx)
-            self.doc.close()
-            self.doc = new_doc
+            self.doc.select(order)
         except Exception as exc:
             return False, str(exc)
-        self.is_dirty = True
+        inverse = [0] * len(order)
+        for position, source in enumerate(order):
+            inverse[source] = position
+        self._record("reorder_pages", inverse)
+        self._touch(structural=True)
         return True, ""
 
+    @traced("engine.keep_pages")
     def keep_pages(self, indices):
         if not self.doc:
             return False, "문서가 열려 있지 않습니다."
@@ -126,20 +446,23 @@ class PdfEngine:
         unique = sorted({i for i in indices if 0 <= i < len(self.doc)})
         if not unique:
             return False, "선택된 페이지가 없습니다."
+        kept = set(unique)
+        removed = [i for i in range(len(self.doc)) if i not in kept]
         try:
-            new_doc = fitz.open()
-            for idx in unique:
-                new_doc.insert_pdf(self.doc, from_page=idx, to_page=idx)
-            self.doc.close()
-            self.doc = new_doc
+            payload = self._capture_pages(removed) if removed else None
+            self.doc.select(unique)
         except Exception as exc:
             return False, str(exc)
-        self.is_dirty = True
+        if removed:
+            self._record("restore_pages", payload, removed)
+        self._touch(structural=True)
         return True, ""
 
+    @traced("engine.insert_pdf")
     def insert_pdf(self, path):
         if not self.doc:
             return False, "문서가 열려 있지 않습니다."
+        before = len(self.doc)
         try:
             other_doc = fitz.open(path)
             try:
@@ -148,46 +471,833 @@ class PdfEngine:
                 other_doc.close()
         except Exception as exc:
             return False, str(exc)
-        self.is_dirty = True
+        self._record("remove_pages", list(range(before, len(self.doc))))
+        self._touch(structural=True)
         return True, ""
 
+    @traced("engine.insert_pdf_at")
     def insert_pdf_at(self, path, index):
+        return self.insert_pdfs_at([path], index)
+
+    @traced("engine.insert_pdfs_at")
+    def insert_pdfs_at(self, paths, index):
         if not self.doc:
             return False, "문서가 열려 있지 않습니다."
-        if index < 0:
-            index = 0
-        if index > len(self.doc):
-            index = len(self.doc)
+        index = max(0, min(index, len(self.doc)))
+        before = len(self.doc)
         try:
-            other_doc = fitz.open(path)
+            for path in paths:
+                other_doc = fitz.open(path)
+                try:
+                    position = index + len(self.doc) - before
+                    self.doc.insert_pdf(other_doc, start_at=position if position < len(self.doc) else -1)
+                finally:
+                    other_doc.close()
+        except Exception as exc:
+            if len(self.doc) > before:
+                self.doc.delete_pages(list(range(index, index + len(self.doc) - before)))
+            return False, str(exc)
+        if len(self.doc) > before:
+            self._record("remove_pages", list(range(index, index + len(self.doc) - before)))
+        self._touch(structural=True)
+        return True, ""
+
+    @traced("engine.remove_pages")
+    def remove_pages(self, indices):
+        if not self.doc:
+            return False, "문서가 열려 있지 않습니다."
+        unique = sorted(set(indices))
+        if not unique or unique[0] < 0 or unique[-1] >= len(self.doc):
+            return False, "유효하지 않은 페이지입니다."
+        try:
+            payload = self._capture_pages(unique)
+            self.doc.delete_pages(unique)
+        except Exception as exc:
+            return False, str(exc)
+        self._record("restore_pages", payload, unique)
+        self._touch(structural=True)
+        return True, ""
+
+    @traced("engine.restore_pages")
+    def restore_pages(self, payload, positions):
+        if not self.doc:
+            return False, "문서가 열려 있지 않습니다."
+        if payload is None:
+            return False, "유효하지 않은 상태 데이터입니다."
+        positions = sorted(positions)
+        try:
+            side_doc = fitz.open(stream=payload, filetype="pdf")
             try:
-                new_doc = fitz.open()
-                if index > 0:
-                    new_doc.insert_pdf(self.doc, from_page=0, to_page=index - 1)
-                new_doc.insert_pdf(other_doc)
-                if index < len(self.doc):
-                    new_doc.insert_pdf(self.doc, from_page=index, to_page=len(self.doc) - 1)
-                self.doc.close()
-                self.doc = new_doc
+                if len(side_doc) != len(positions):
+                    return False, "유효하지 않은 상태 데이터입니다."
+                offset = 0
+                for start, end in page_runs(positions):
+                    count = end - start + 1
+                    self.doc.insert_pdf(
+                        side_doc,
+                        from_page=offset,
+                        to_page=offset + count - 1,
+                        start_at=start if start < len(self.doc) else -1,
+                    )
+                    offset += count
             finally:
-                other_doc.close()
+                side_doc.close()
         except Exception as exc:
             return False, str(exc)
-        self.is_dirty = True
+        self._record("remove_pages", positions)
+        self._touch(structural=True)
         return True, ""
 
-    def export_pages(self, indices, path):
+    @traced("engine.export_pages")
+    def export_pages(self, indices, path, profile=None):
         if not self.doc:
             return False, "문서가 열려 있지 않습니다."
         if not indices:
             return False, "선택된 페이지가 없습니다."
+        valid = [idx for idx in indices if 0 <= idx < len(self.doc)]
+        if not valid:
+            return False, "선택된 페이지가 없습니다."
+        start = time.perf_counter()
+        before = self.input_bytes()
         try:
             new_doc = fitz.open()
-            for idx in indices:
-                if 0 <= idx < len(self.doc):
-                    new_doc.insert_pdf(self.doc, from_page=idx, to_page=idx)
-            new_doc.save(path)
-            new_doc.close()
+            try:
+                copy_pages(new_doc, self.doc, valid)
+                new_doc.save(path, **save_options(profile))
+            finally:
+                new_doc.close()
+        except Exception as exc:
+            return False, str(exc)
+        self._report_save(profile, path, before, start)
+        return True, ""
+
+
+class LazyPdfEngine(PdfEngine):
+    def __init__(self):
+        super().__init__()
+        self.pages = None
+        self.sources = {}
+        self._source_tokens = {}
+        self._token_aliases = {}
+        self._next_source = 0
+        self._journal_pending = False
+
+    def is_open(self):
+        return self.pages is not None
+
+    @traced("engine.open")
+    def open(self, path):
+        start = time.perf_counter()
+        try:
+            source_id = self._add_source(path)
+        except Exception as exc:
+            return False, str(exc)
+        parsed = time.perf_counter()
+        self.pages = self._source_pages(source_id)
+        self._open_started = start
+        self.open_timings = {
+            "parse": parsed - start,
+            "page_tree": time.perf_counter() - parsed,
+            "first_paint": None,
+            "repaired": bool(self.sources[source_id]["doc"].is_repaired),
+            "pages": len(self.pages),
+        }
+        self.path = path
+        self.is_dirty = False
+        self.revision += 1
+        self.structure_revision = 0
+        self._journal_pending = True
+        return True, ""
+
+    @traced("engine.close")
+    def close(self):
+        if self.pages is not None:
+            self.pages = None
+            self.path = None
+            self.is_dirty = False
+            self._touch(structural=True, dirty=False)
+        for source in self.sources.values():
+            source["doc"].close()
+            if source["temporary"]:
+                self._stale_files.append(source["path"])
+        self.sources = {}
+        self._source_tokens = {}
+        self._token_aliases = {}
+        self._discard_render_snapshots()
+        self._journal_pending = False
+        if self.journal is not None:
+            self.journal.discard()
+
+    def _add_source(self, path, temporary=False):
+        token = file_token(path)
+        source_id = self._source_tokens.get(token)
+        if source_id is not None:
+            return source_id
+        doc = fitz.open(path)
+        if not doc.is_pdf:
+            try:
+                data = doc.convert_to_pdf()
+            finally:
+                doc.close()
+            return self._add_source(self._write_temp_source(data), temporary=True)
+        source_id = self._next_source
+        self._next_source += 1
+        self.sources[source_id] = {
+            "doc": doc,
+            "path": path,
+            "token": token,
+            "key": content_token(path),
+            "rotations": {},
+            "temporary": temporary,
+        }
+        self._source_tokens[token] = source_id
+        self._log("source", self._source_entry(source_id))
+        return source_id
+
+    def _source_entry(self, source_id):
+        source = self.sources[source_id]
+        return {
+            "id": source_id,
+            "path": source["path"],
+            "token": source["token"],
+            "key": source["key"],
+            "rotations": source["rotations"],
+            "temporary": source["temporary"],
+        }
+
+    def _restore_source(self, entry):
+        path = entry["path"]
+        if not os.path.exists(path) or file_token(path) != entry["token"]:
+            raise ValueError(f"원본 파일이 변경되었거나 없습니다: {path}")
+        source_id = entry["id"]
+        rotations = {int(number): rotation for number, rotation in entry["rotations"].items()}
+        if source_id in self.sources:
+            self.sources[source_id]["doc"].close()
+        self.sources[source_id] = {
+            "doc": fitz.open(path),
+            "path": path,
+            "token": entry["token"],
+            "key": entry["key"],
+            "rotations": rotations,
+            "temporary": entry["temporary"],
+        }
+        if not rotations:
+            self._source_tokens[entry["token"]] = source_id
+        self._next_source = max(self._next_source, source_id + 1)
+
+    def _log(self, name, *args):
+        if self._journal_pending and self.journal is not None:
+            self._checkpoint(dirty=True)
+            return
+        super()._log(name, *args)
+
+    def _checkpoint(self, dirty=None):
+        self._journal_pending = False
+        if self.journal is None or self.pages is None:
+            return
+        self.journal.reset(
+            {
+                "path": self.path,
+                "dirty": self.is_dirty if dirty is None else dirty,
+                "sources": [self._source_entry(source_id) for source_id in self.sources],
+                "pages": self.pages,
+            }
+        )
+
+    @traced("engine.restore_session")
+    def restore_session(self, state, operations):
+        self.close()
+        journal, recorder = self.journal, self.recorder
+        self.journal = self.recorder = None
+        try:
+            for entry in state["sources"]:
+                self._restore_source(entry)
+            self.pages = [PageRef(*ref) for ref in state["pages"]]
+            for name, args in operations:
+                if name == "source":
+                    self._restore_source(args[0])
+                    continue
+                if name in ("replace_pages", "restore_pages"):
+                    args = [[PageRef(*ref) for ref in args[0]]] + list(args[1:])
+                ok, err = getattr(self, name)(*args)
+                if not ok:
+                    raise ValueError(err)
+        except Exception as exc:
+            self.close()
+            return False, str(exc) or "복구 기록을 읽을 수 없습니다."
+        finally:
+            self.journal, self.recorder = journal, recorder
+        self.path = state["path"]
+        self.revision += 1
+        self.structure_revision = 0
+        self.is_dirty = True
+        self._checkpoint()
+        return True, ""
+
+    def _write_temp_source(self, data):
+        fd, path = tempfile.mkstemp(prefix="pdf_edit_source_", suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+        except Exception:
+            self._remove_file(path)
+            raise
+        return path
+
+    def _source_pages(self, source_id):
+        return [PageRef(source_id, number, 0) for number in range(len(self.sources[source_id]["doc"]))]
+
+    def _source_page(self, ref):
+        return self.sources[ref.source]["doc"].load_page(ref.number)
+
+    def _valid_index(self, index):
+        return 0 <= index < len(self.pages)
+
+    def _ref_rotation(self, ref, page):
+        base = self.sources[ref.source]["rotations"].get(ref.number, page.rotation)
+        return (base + ref.delta) % 360
+
+    @traced("engine.get_state_bytes")
+    def get_state_bytes(self):
+        if self.pages is None:
+            return None
+        doc = self._build_document(self.pages)
+        try:
+            return doc.tobytes()
+        finally:
+            doc.close()
+
+    @traced("engine.load_state_bytes")
+    def load_state_bytes(self, data, mark_dirty=True):
+        if data is None:
+            return False, "유효하지 않은 상태 데이터입니다."
+        try:
+            path = self._write_temp_source(data)
+            try:
+                source_id = self._add_source(path, temporary=True)
+            except Exception:
+                self._remove_file(path)
+                raise
+        except Exception as exc:
+            return False, str(exc)
+        previous = self.pages
+        self.pages = self._source_pages(source_id)
+        if previous is not None:
+            self._record("replace_pages", previous)
+        self._log("replace_pages", self.pages)
+        self.is_dirty = mark_dirty
+        self._touch(structural=True, dirty=False)
+        return True, ""
+
+    @traced("engine.replace_pages")
+    def replace_pages(self, pages):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        if any(ref.source not in self.sources for ref in pages):
+            return False, "유효하지 않은 상태 데이터입니다."
+        previous = self.pages
+        self.pages = list(pages)
+        self._record("replace_pages", previous)
+        self._log("replace_pages", self.pages)
+        self._touch(structural=True)
+        return True, ""
+
+    def page_count(self):
+        return len(self.pages) if self.pages else 0
+
+    def page_size(self, index):
+        if not self.pages:
+            return 0, 0
+        ref = self.pages[index]
+        page = self._source_page(ref)
+        rect = page.rect
+        if (self._ref_rotation(ref, page) - page.rotation) % 180:
+            return rect.height, rect.width
+        return rect.width, rect.height
+
+    @traced("engine.get_page_pixmap")
+    def get_page_pixmap(self, index, scale):
+        if not self.pages:
+            return None
+        ref = self.pages[index]
+        page = self._source_page(ref)
+        turn = (self._ref_rotation(ref, page) - page.rotation) % 360
+        return page.get_pixmap(matrix=fitz.Matrix(scale, scale).prerotate(turn))
+
+    def page_rotation(self, index):
+        if not self.pages:
+            return 0
+        ref = self.pages[index]
+        return self._ref_rotation(ref, self._source_page(ref))
+
+    def page_fingerprint(self, index):
+        if not self.pages or not self._valid_index(index):
+            return None
+        ref = self.pages[index]
+        return f"{self.sources[ref.source]['key']}:{ref.number}"
+
+    def render_task(self, index, scale, clip=None):
+        if not self.pages or not self._valid_index(index):
+            return None
+        ref = self.pages[index]
+        source = self.sources[ref.source]
+        return (source["path"], source["token"]), ref.number, self.page_rotation(index), round(scale, 4), clip
+
+    def _document_plan(self, refs):
+        numbers = [ref.number for ref in refs]
+        source_ids = {ref.source for ref in refs}
+        direct = None
+        if len(source_ids) == 1 and len(set(numbers)) == len(numbers):
+            source = self.sources[refs[0].source]
+            if os.path.exists(source["path"]) and file_token(source["path"]) == source["token"]:
+                direct = source["path"]
+        pages = []
+        for ref in refs:
+            rotation = None
+            if ref.delta or ref.number in self.sources[ref.source]["rotations"]:
+                rotation = self._ref_rotation(ref, self._source_page(ref))
+            pages.append((ref.source, ref.number, rotation))
+        sources = {source_id: self.sources[source_id]["path"] for source_id in source_ids}
+        return {"direct": direct, "pages": pages, "sources": sources}
+
+    def _plan_is_portable(self, plan):
+        for source_id, path in plan["sources"].items():
+            if not os.path.exists(path) or file_token(path) != self.sources[source_id]["token"]:
+                return False
+        return True
+
+    def _build_document(self, refs):
+        return build_document(self._document_plan(refs), lambda source_id: self.sources[source_id]["doc"])
+
+    def _incremental_source(self, path, profile):
+        if (profile or DEFAULT_SAVE_PROFILE) not in INCREMENTAL_PROFILES:
+            return None
+        source_id = self.pages[0].source
+        source = self.sources[source_id]
+        if source["temporary"] or not same_path(path, source["path"]):
+            return None
+        if any(ref.source != source_id or ref.number != number for number, ref in enumerate(self.pages)):
+            return None
+        if len(self.pages) != len(source["doc"]) or file_token(path) != source["token"]:
+            return None
+        return source_id
+
+    def _save_incremental(self, source_id):
+        source = self.sources[source_id]
+        doc = fitz.open(source["path"])
+        try:
+            if not doc.can_save_incrementally():
+                doc.close()
+                return False
+            changed = {}
+            for ref in self.pages:
+                if not ref.delta and ref.number not in source["rotations"]:
+                    continue
+                page = doc.load_page(ref.number)
+                rotation = self._ref_rotation(ref, self._source_page(ref))
+                if page.rotation != rotation:
+                    changed[ref.number] = page.rotation
+                    page.set_rotation(rotation)
+            if changed:
+                doc.saveIncr()
+        except Exception:
+            doc.close()
+            raise
+        if not changed:
+            doc.close()
+            return True
+        for number, rotation in changed.items():
+            source["rotations"].setdefault(number, rotation)
+        source["doc"].close()
+        source["doc"] = doc
+        self._retire_token(source_id)
+        source["token"] = file_token(source["path"])
+        return True
+
+    def _retire_token(self, source_id):
+        token = self.sources[source_id]["token"]
+        self._source_tokens.pop(token, None)
+        self._token_aliases[token] = source_id
+
+    def _temp_target(self, path):
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix=".pdf_edit_", suffix=".pdf", dir=folder)
+        os.close(fd)
+        return temp_path
+
+    def _write_document(self, refs, path, **options):
+        clashing = any(same_path(source["path"], path) for source in self.sources.values())
+        doc = self._build_document(refs)
+        try:
+            if not clashing:
+                doc.save(path, **options)
+                return
+            temp_path = self._temp_target(path)
+            try:
+                doc.save(temp_path, **options)
+            except Exception:
+                self._remove_file(temp_path)
+                raise
+        finally:
+            doc.close()
+        self._install_file(temp_path, path)
+
+    def _install_file(self, temp_path, path):
+        clashing = [source_id for source_id, source in self.sources.items() if same_path(source["path"], path)]
+        if not clashing:
+            try:
+                os.replace(temp_path, path)
+            except OSError:
+                self._remove_file(temp_path)
+                raise
+            return
+        backup_path = self._temp_target(path)
+        for source_id in clashing:
+            self.sources[source_id]["doc"].close()
+        try:
+            os.replace(path, backup_path)
+            os.replace(temp_path, path)
+        except OSError:
+            if not os.path.exists(path):
+                os.replace(backup_path, path)
+            self._remove_file(temp_path)
+            self._remove_file(backup_path)
+            for source_id in clashing:
+                self.sources[source_id]["doc"] = fitz.open(path)
+            raise
+        for source_id in clashing:
+            source = self.sources[source_id]
+            source["doc"] = fitz.open(backup_path)
+            source["path"] = backup_path
+            source["temporary"] = True
+            self._retire_token(source_id)
+            source["token"] = file_token(backup_path)
+
+    def input_bytes(self, refs=None):
+        if refs is None:
+            refs = self.pages or []
+        return sum(file_size(self.sources[source_id]["path"]) for source_id in {ref.source for ref in refs})
+
+    @traced("engine.save")
+    def save(self, path, profile=None):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        if not self.pages:
+            return False, "선택된 페이지가 없습니다."
+        start = time.perf_counter()
+        before = self.input_bytes()
+        try:
+            options = save_options(profile)
+            source_id = self._incremental_source(path, profile)
+            incremental = source_id is not None and self._save_incremental(source_id)
+            if not incremental:
+                self._write_document(self.pages, path, **options)
+        except Exception as exc:
+            return False, str(exc)
+        self._report_save(profile, path, before, start, incremental)
+        self.is_dirty = False
+        self._checkpoint()
+        return True, ""
+
+    def can_save_incrementally(self, path, profile=None):
+        return bool(self.pages) and self._incremental_source(path, profile) is not None
+
+    @traced("engine.prepare_save")
+    def prepare_save(self, path, profile=None):
+        if self.pages is None:
+            return None, "문서가 열려 있지 않습니다."
+        if not self.pages:
+            return None, "선택된 페이지가 없습니다."
+        try:
+            options = save_options(profile)
+            plan = self._document_plan(self.pages)
+            if not self._plan_is_portable(plan):
+                return None, ""
+            temp_path = self._temp_target(path)
+        except Exception as exc:
+            return None, str(exc)
+        job = {
+            "path": path,
+            "profile": profile,
+            "options": options,
+            "plan": plan,
+            "temp_path": temp_path,
+            "revision": self.revision,
+            "before": self.input_bytes(),
+            "start": time.perf_counter(),
+        }
+        self._pinned_files += list(plan["sources"].values())
+        return job, ""
+
+    @traced("engine.finish_save")
+    def finish_save(self, job):
+        self._release_save(job)
+        try:
+            self._install_file(job["temp_path"], job["path"])
         except Exception as exc:
             return False, str(exc)
+        self._report_save(job["profile"], job["path"], job["before"], job["start"])
+        if self.revision == job["revision"]:
+            self.is_dirty = False
+        self._checkpoint()
+        return True, ""
+
+    def abort_save(self, job):
+        self._release_save(job)
+        self._remove_file(job["temp_path"])
+
+    def _release_save(self, job):
+        for path in job["plan"]["sources"].values():
+            self._pinned_files.remove(path)
+        self._discard_render_snapshots()
+
+    @traced("engine.delete_page")
+    def delete_page(self, index):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        if not self._valid_index(index):
+            return False, "유효하지 않은 페이지입니다."
+        ref = self.pages.pop(index)
+        self._record("restore_pages", [ref], [index])
+        self._log("delete_page", index)
+        self._touch(structural=True)
         return True, ""
+
+    @traced("engine.rotate_page_by")
+    def rotate_page_by(self, index, delta):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        if not self._valid_index(index):
+            return False, "유효하지 않은 페이지입니다."
+        ref = self.pages[index]
+        self.pages[index] = ref._replace(delta=(ref.delta + delta) % 360)
+        self._record("rotate_page_by", index, -delta)
+        self._log("rotate_page_by", index, delta)
+        self._touch()
+        return True, ""
+
+    @traced("engine.move_page")
+    def move_page(self, from_index, to_index):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        if not self._valid_index(from_index):
+            return False, "유효하지 않은 페이지입니다."
+        if to_index < 0 or to_index > len(self.pages):
+            return False, "유효하지 않은 페이지입니다."
+        moved_to = to_index if to_index <= from_index else to_index - 1
+        self.pages.insert(moved_to, self.pages.pop(from_index))
+        self._record("move_page", moved_to, from_index if from_index < moved_to else from_index + 1)
+        self._log("move_page", from_index, to_index)
+        self._touch(structural=True)
+        return True, ""
+
+    @traced("engine.reorder_pages")
+    def reorder_pages(self, order):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        if len(order) != len(self.pages):
+            return False, "유효하지 않은 페이지 순서입니다."
+        if sorted(order) != list(range(len(self.pages))):
+            return False, "유효하지 않은 페이지 순서입니다."
+        self.pages = [self.pages[source] for source in order]
+        inverse = [0] * len(order)
+        for position, source in enumerate(order):
+            inverse[source] = position
+        self._record("reorder_pages", inverse)
+        self._log("reorder_pages", order)
+        self._touch(structural=True)
+        return True, ""
+
+    @traced("engine.keep_pages")
+    def keep_pages(self, indices):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        if not indices:
+            return False, "선택된 페이지가 없습니다."
+        kept = {i for i in indices if self._valid_index(i)}
+        if not kept:
+            return False, "선택된 페이지가 없습니다."
+        removed = [i for i in range(len(self.pages)) if i not in kept]
+        if removed:
+            self._record("restore_pages", [self.pages[i] for i in removed], removed)
+        self.pages = [self.pages[i] for i in sorted(kept)]
+        self._log("keep_pages", sorted(kept))
+        self._touch(structural=True)
+        return True, ""
+
+    @traced("engine.insert_pdf")
+    def insert_pdf(self, path):
+        return self.insert_pdf_at(path, self.page_count())
+
+    @traced("engine.insert_pdf_at")
+    def insert_pdf_at(self, path, index):
+        return self.insert_pdfs_at([path], index)
+
+    @traced("engine.insert_pdfs_at")
+    def insert_pdfs_at(self, paths, index):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        try:
+            added = [ref for path in paths for ref in self._source_pages(self._add_source(path))]
+        except Exception as exc:
+            return False, str(exc)
+        return self._insert_refs(added, index)
+
+    def _insert_refs(self, refs, index):
+        index = max(0, min(index, len(self.pages)))
+        self.pages[index:index] = refs
+        if refs:
+            positions = list(range(index, index + len(refs)))
+            self._record("remove_pages", positions)
+            self._log("restore_pages", refs, positions)
+        self._touch(structural=True)
+        return True, ""
+
+    @traced("engine.remove_pages")
+    def remove_pages(self, indices):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        unique = sorted(set(indices))
+        if not unique or unique[0] < 0 or unique[-1] >= len(self.pages):
+            return False, "유효하지 않은 페이지입니다."
+        removed = set(unique)
+        self._record("restore_pages", [self.pages[i] for i in unique], unique)
+        self.pages = [ref for i, ref in enumerate(self.pages) if i not in removed]
+        self._log("remove_pages", unique)
+        self._touch(structural=True)
+        return True, ""
+
+    @traced("engine.restore_pages")
+    def restore_pages(self, payload, positions):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        positions = sorted(positions)
+        if payload is None or len(payload) != len(positions):
+            return False, "유효하지 않은 상태 데이터입니다."
+        if any(ref.source not in self.sources for ref in payload):
+            return False, "유효하지 않은 상태 데이터입니다."
+        if positions and (positions[0] < 0 or positions[-1] >= len(self.pages) + len(positions)):
+            return False, "유효하지 않은 페이지입니다."
+        for position, ref in zip(positions, payload):
+            self.pages.insert(position, ref)
+        self._record("remove_pages", positions)
+        self._log("restore_pages", payload, positions)
+        self._touch(structural=True)
+        return True, ""
+
+    @traced("engine.export_pages")
+    def export_pages(self, indices, path, profile=None):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        if not indices:
+            return False, "선택된 페이지가 없습니다."
+        valid = [idx for idx in indices if self._valid_index(idx)]
+        if not valid:
+            return False, "선택된 페이지가 없습니다."
+        refs = [self.pages[i] for i in valid]
+        start = time.perf_counter()
+        before = self.input_bytes(refs)
+        try:
+            self._write_document(refs, path, **save_options(profile))
+        except Exception as exc:
+            return False, str(exc)
+        self._report_save(profile, path, before, start)
+        return True, ""
+
+    def repair_tasks(self):
+        tasks = []
+        for source_id, source in self.sources.items():
+            if source["doc"].is_repaired and not source["temporary"]:
+                fd, target = tempfile.mkstemp(prefix="pdf_edit_source_", suffix=".pdf")
+                os.close(fd)
+                tasks.append((source_id, source["path"], source["token"], target))
+        return tasks
+
+    @traced("engine.adopt_repaired")
+    def adopt_repaired(self, task, result):
+        source_id, path, token, target = task
+        source = self.sources.get(source_id)
+        if not result or not result[0] or source is None or source["path"] != path or source["token"] != token:
+            self._remove_file(target)
+            return False
+        try:
+            doc = fitz.open(target)
+        except Exception:
+            self._remove_file(target)
+            return False
+        if doc.is_repaired or len(doc) != len(source["doc"]):
+            doc.close()
+            self._remove_file(target)
+            return False
+        source["doc"].close()
+        source["doc"] = doc
+        source["path"] = target
+        source["token"] = file_token(target)
+        source["temporary"] = True
+        self.open_timings["repair"] = result[2]
+        if not self._journal_pending:
+            self._log("source", self._source_entry(source_id))
+        return True
+
+    @traced("engine.clip_pages")
+    def clip_pages(self, indices):
+        if not self.pages:
+            return None
+        pages = []
+        used = {}
+        for index in indices:
+            if not self._valid_index(index):
+                continue
+            ref = self.pages[index]
+            source = self.sources[ref.source]
+            rotation = None
+            if ref.delta or ref.number in source["rotations"]:
+                rotation = self._ref_rotation(ref, self._source_page(ref))
+            pages.append((ref.source, ref.number, rotation))
+            used[ref.source] = source
+        if not pages:
+            return None
+        clip = {
+            "direct": None,
+            "pages": pages,
+            "sources": {source_id: source["path"] for source_id, source in used.items()},
+            "tokens": {source_id: source["token"] for source_id, source in used.items()},
+            "temporary": [source["path"] for source in used.values() if source["temporary"]],
+        }
+        self._pinned_files += clip["temporary"]
+        return clip
+
+    def release_clip(self, clip):
+        for path in clip["temporary"]:
+            self._pinned_files.remove(path)
+        self._discard_render_snapshots()
+
+    def _clip_source(self, clip, source_id):
+        token = clip["tokens"][source_id]
+        for candidate_id, source in self.sources.items():
+            if source["token"] == token:
+                return candidate_id
+        if self._token_aliases.get(token) in self.sources:
+            return self._token_aliases[token]
+        path = clip["sources"][source_id]
+        if not os.path.exists(path) or file_token(path) != token:
+            raise ValueError("복사한 페이지의 원본 파일이 변경되었거나 없습니다.")
+        return self._add_source(path, temporary=path in clip["temporary"])
+
+    @traced("engine.paste_clip")
+    def paste_clip(self, clip, index):
+        if self.pages is None:
+            return False, "문서가 열려 있지 않습니다."
+        try:
+            mapping = {source_id: self._clip_source(clip, source_id) for source_id in clip["sources"]}
+            added = []
+            for source_id, number, rotation in clip["pages"]:
+                target = self.sources[mapping[source_id]]
+                delta = 0
+                if rotation is not None:
+                    page = target["doc"].load_page(number)
+                    delta = (rotation - target["rotations"].get(number, page.rotation)) % 360
+                added.append(PageRef(mapping[source_id], number, delta))
+        except Exception as exc:
+            return False, str(exc)
+        return self._insert_refs(added, index)
@@ -0,0 +1,45 @@
+import time
+
+import fitz
+
+
+def inspect_pdf(path):
+    report = {"path": path, "ok": False, "pages": 0, "encrypted": False, "repaired": False, "error": ""}
+    try:
+        doc = fitz.open(path)
+    except Exception as exc:
+        report["error"] = str(exc) or "PDF를 열 수 없습니다."
+        return report
+    try:
+        report["encrypted"] = bool(doc.needs_pass)
+        report["repaired"] = bool(doc.is_repaired)
+        if not doc.is_pdf:
+            report["error"] = "PDF 파일이 아닙니다."
+        elif doc.needs_pass:
+            report["error"] = "암호로 보호된 PDF입니다."
+        elif len(doc) == 0:
+            report["error"] = "페이지가 없습니다."
+        else:
+            doc.load_page(0)
+            doc.load_page(len(doc) - 1)
+            report["pages"] = len(doc)
+            report["ok"] = True
+    except Exception as exc:
+        report["error"] = str(exc) or "손상된 PDF입니다."
+    finally:
+        doc.close()
+    return report
+
+
+def repair_pdf(task):
+    _source_id, path, _token, target = task
+    start = time.perf_counter()
+    try:
+        doc = fitz.open(path)
+        try:
+            doc.save(target, garbage=1)
+        finally:
+            doc.close()
+    except Exception as exc:
+        return False, str(exc) or "PDF를 복구할 수 없습니다.", 0.0
+    return True, "", time.perf_counter() - start
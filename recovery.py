@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+import time
+
+from app_paths import data_dir
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+
+def _try_lock(handle):
+    try:
+        if msvcrt is not None:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _lock_path(path):
+    return os.path.splitext(path)[0] + ".lock"
+
+
+class RecoveryJournal:
+    def __init__(self, folder=None, batch_size=32):
+        self.folder = folder
+        self.batch_size = batch_size
+        self.path = None
+        self.handle = None
+        self.lock = None
+        self.pending = 0
+
+    def attach(self, engine):
+        engine.journal = self
+
+    def _folder(self):
+        if self.folder is None:
+            self.folder = data_dir("recovery")
+        else:
+            os.makedirs(self.folder, exist_ok=True)
+        return self.folder
+
+    def reset(self, state):
+        if self.handle is None:
+            fd, self.path = tempfile.mkstemp(
+                prefix=f"session-{os.getpid()}-{int(time.time() * 1000)}-", suffix=".jsonl", dir=self._folder()
+            )
+            self.lock = open(_lock_path(self.path), "a+")
+            _try_lock(self.lock)
+            self.handle = os.fdopen(fd, "w", encoding="utf-8")
+        else:
+            self.handle.seek(0)
+            self.handle.truncate()
+        self.handle.write(json.dumps(["checkpoint", [state]], ensure_ascii=False) + "\n")
+        self.pending += 1
+        self.sync()
+
+    def record(self, name, args):
+        if self.handle is None:
+            return
+        self.handle.write(json.dumps([name, args], ensure_ascii=False) + "\n")
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.sync()
+
+    def sync(self):
+        if self.handle is None or not self.pending:
+            return
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+        self.pending = 0
+
+    def discard(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+        if self.lock is not None:
+            self.lock.close()
+            self.lock = None
+        if self.path is not None:
+            self.remove(self.path)
+            self.path = None
+        self.pending = 0
+
+    def close(self):
+        self.discard()
+
+    def orphans(self):
+        found = []
+        try:
+            names = os.listdir(self._folder())
+        except OSError:
+            return found
+        for name in names:
+            path = os.path.join(self.folder, name)
+            if path == self.path or not name.startswith("session-") or not name.endswith(".jsonl"):
+                continue
+            try:
+                with open(_lock_path(path), "a+") as lock:
+                    if not _try_lock(lock):
+                        continue
+            except OSError:
+                continue
+            found.append(path)
+        found.sort(key=os.path.getmtime, reverse=True)
+        return found
+
+    @staticmethod
+    def load(path):
+        records = []
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        if not records or records[0][0] != "checkpoint":
+            return None
+        state = records[0][1][0]
+        operations = records[1:]
+        if not operations and not state.get("dirty"):
+            return None
+        return state, operations
+
+    @staticmethod
+    def remove(path):
+        for stale in (path, _lock_path(path)):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
@@ -0,0 +1,189 @@
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+from tracing import tracer
+
+_open_docs = {}
+_max_open_docs = 4
+
+
+def _open_source(source):
+    doc = _open_docs.pop(source, None)
+    if doc is None:
+        while len(_open_docs) >= _max_open_docs:
+            oldest = next(iter(_open_docs))
+            _open_docs.pop(oldest).close()
+        doc = fitz.open(source[0])
+    _open_docs[source] = doc
+    return doc
+
+
+def render_page(task):
+    source, page_number, rotation, scale, clip = task
+    doc = _open_source(source)
+    page = doc.load_page(page_number)
+    if rotation is not None and page.rotation != rotation:
+        page.set_rotation(rotation)
+    matrix = fitz.Matrix(scale, scale)
+    if clip is None:
+        pix = page.get_pixmap(matrix=matrix)
+    else:
+        pix = page.get_pixmap(matrix=matrix, clip=fitz.Rect(clip) * ~matrix)
+    mode = "RGBA" if pix.alpha else "RGB"
+    return mode, pix.width, pix.height, pix.samples
+
+
+class RenderService:
+    def __init__(self, app, max_workers=None):
+        self.app = app
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.executor = None
+        self.executor_failed = False
+        self.results = queue.Queue()
+        self.pending = {}
+        self.callbacks = {}
+        self.in_flight = {}
+        self.batches = []
+        self.generation = 0
+        self.poll_interval = 15
+        self._poll_job = None
+
+    def _ensure_executor(self):
+        if self.executor is None and not self.executor_failed:
+            try:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            except (OSError, NotImplementedError, ImportError):
+                self.executor_failed = True
+        return self.executor
+
+    def request(self, task, callback, priority=0):
+        self.callbacks.setdefault(task, []).append(callback)
+        if task in self.in_flight:
+            return
+        current = self.pending.get(task)
+        if current is None or priority < current:
+            self.pending[task] = priority
+        self._pump()
+
+    def run_batch(self, func, items, callback):
+        executor = self._ensure_executor()
+        futures = [None] * len(items)
+        if executor is not None:
+            try:
+                futures = [executor.submit(func, item) for item in items]
+            except RuntimeError:
+                self.executor = None
+                self.executor_failed = True
+        self.batches.append((self.generation, func, items, futures, callback))
+        self._schedule_poll()
+        return futures
+
+    def cancel(self, task, callback=None):
+        callbacks = self.callbacks.get(task)
+        if callbacks is None:
+            return
+        if callback is not None and callback in callbacks:
+            callbacks.remove(callback)
+        else:
+            callbacks.clear()
+        if callbacks:
+            return
+        del self.callbacks[task]
+        self.pending.pop(task, None)
+        future = self.in_flight.get(task)
+        if future is not None and future.cancel():
+            del self.in_flight[task]
+            tracer.count("render.cancelled")
+
+    def cancel_all(self):
+        self.generation += 1
+        self.pending.clear()
+        self.callbacks.clear()
+        for future in self.in_flight.values():
+            if future is not None:
+                future.cancel()
+        self.in_flight.clear()
+        for _generation, _func, _items, futures, _callback in self.batches:
+            for future in futures:
+                if future is not None:
+                    future.cancel()
+        self.batches.clear()
+
+    def shutdown(self):
+        self.cancel_all()
+        if self._poll_job is not None:
+            try:
+                self.app.after_cancel(self._poll_job)
+            except Exception:
+                pass
+            self._poll_job = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _pump(self):
+        executor = self._ensure_executor()
+        limit = self.max_workers * 2 if executor is not None else 1
+        while self.pending and len(self.in_flight) < limit:
+            task = min(self.pending, key=self.pending.get)
+            del self.pending[task]
+            if executor is None:
+                self.in_flight[task] = None
+                self.results.put((self.generation, task, None))
+                continue
+            try:
+                future = executor.submit(render_page, task)
+            except RuntimeError:
+                self.executor = None
+                self.executor_failed = True
+                self.pending[task] = 0
+                return self._pump()
+            self.in_flight[task] = future
+            tracer.count("render.submitted")
+            future.add_done_callback(
+                lambda done, task=task, generation=self.generation: self.results.put((generation, task, done))
+            )
+        self._schedule_poll()
+
+    def _schedule_poll(self):
+        if self._poll_job is None and (self.in_flight or self.pending or self.batches):
+            self._poll_job = self.app.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        while True:
+            try:
+                generation, task, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation or task not in self.in_flight or self.in_flight[task] is not future:
+                continue
+            del self.in_flight[task]
+            callbacks = self.callbacks.pop(task, [])
+            if not callbacks:
+                continue
+            with tracer.span("render.deliver"):
+                result = self._collect(render_page, task, future)
+                for callback in callbacks:
+                    callback(result)
+        for batch in list(self.batches):
+            generation, func, items, futures, callback = batch
+            if any(future is not None and not future.done() for future in futures):
+                continue
+            self.batches.remove(batch)
+            if generation == self.generation:
+                callback([self._collect(func, item, future) for item, future in zip(items, futures)])
+        self._pump()
+
+    def _collect(self, func, task, future):
+        try:
+            if future is None:
+                return func(task)
+            if future.cancelled():
+                return None
+            return future.result()
+        except Exception:
+            return None
@@ -0,0 +1,141 @@
+import multiprocessing
+import queue
+
+import fitz
+
+from pdf_engine import build_document
+
+
+def write_document_job(plan, options, temp_path, messages):
+    docs = {}
+
+    def open_source(source_id):
+        if source_id not in docs:
+            docs[source_id] = fitz.open(plan["sources"][source_id])
+        return docs[source_id]
+
+    def report(done, total):
+        messages.put(("progress", 0.5 * done / total))
+
+    try:
+        doc = build_document(plan, open_source, report)
+        try:
+            doc.save(temp_path, **options)
+        finally:
+            doc.close()
+    except Exception as exc:
+        messages.put(("error", str(exc) or type(exc).__name__))
+        return
+    finally:
+        for doc in docs.values():
+            doc.close()
+    messages.put(("progress", 1.0))
+    messages.put(("done", None))
+
+
+class SaveService:
+    def __init__(self, app):
+        self.app = app
+        self.job = None
+        self.process = None
+        self.messages = None
+        self.on_progress = None
+        self.on_done = None
+        self.poll_interval = 50
+        self._poll_job = None
+
+    def is_running(self):
+        return self.job is not None
+
+    def start(self, path, profile, on_progress, on_done):
+        engine = self.app.engine
+        if self.job is not None:
+            on_done(False, "저장이 진행 중입니다.")
+            return
+        job = None
+        err = ""
+        if not engine.can_save_incrementally(path, profile):
+            job, err = engine.prepare_save(path, profile)
+        if job is None:
+            if err:
+                on_done(False, err)
+            else:
+                on_done(*engine.save(path, profile))
+            return
+
+        self.job = job
+        self.on_progress = on_progress
+        self.on_done = on_done
+        args = (job["plan"], job["options"], job["temp_path"])
+        try:
+            self.messages = multiprocessing.Queue()
+            self.process = multiprocessing.Process(target=write_document_job, args=args + (self.messages,), daemon=True)
+            self.process.start()
+        except (OSError, NotImplementedError, ImportError):
+            self.process = None
+            self.messages = queue.Queue()
+            write_document_job(*args, self.messages)
+        self._poll_job = self.app.after(self.poll_interval, self._poll)
+
+    def cancel(self):
+        if self.job is None:
+            return
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(1)
+        self.app.engine.abort_save(self.job)
+        self._reset()
+
+    def shutdown(self):
+        self.cancel()
+
+    def _reset(self):
+        if self._poll_job is not None:
+            try:
+                self.app.after_cancel(self._poll_job)
+            except Exception:
+                pass
+            self._poll_job = None
+        self.job = None
+        self.process = None
+        self.messages = None
+        self.on_progress = None
+        self.on_done = None
+
+    def _next_message(self, timeout=None):
+        try:
+            if timeout is None:
+                return self.messages.get_nowait()
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _poll(self):
+        self._poll_job = None
+        exited = self.process is None or not self.process.is_alive()
+        while True:
+            message = self._next_message(1.0 if exited else None)
+            if message is None:
+                break
+            kind, value = message
+            if kind == "progress":
+                self.on_progress(value)
+                continue
+            if kind == "done":
+                self._finish(*self.app.engine.finish_save(self.job))
+            else:
+                self.app.engine.abort_save(self.job)
+                self._finish(False, value)
+            return
+        if exited:
+            self.app.engine.abort_save(self.job)
+            self._finish(False, "저장 프로세스가 비정상 종료되었습니다.")
+            return
+        self._poll_job = self.app.after(self.poll_interval, self._poll)
+
+    def _finish(self, ok, err):
+        on_done = self.on_done
+        if self.process is not None:
+            self.process.join(1)
+        self._reset()
+        on_done(ok, err)
@@ -0,0 +1,126 @@
+import json
+
+import fitz
+import pytest
+
+from batch_cli import main
+from page_ranges import parse_page_ranges
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    path = str(tmp_path / "sample.pdf")
+    doc = fitz.open()
+    for number in range(5):
+        doc.new_page().insert_text((72, 72), f"Page {number + 1}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def page_texts(path):
+    doc = fitz.open(path)
+    try:
+        return [page.get_text().strip() for page in doc]
+    finally:
+        doc.close()
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("1-3", [0, 1, 2]),
+        ("3-1", [2, 1, 0]),
+        ("end", [4]),
+        ("end-1", [4, 3, 2, 1, 0]),
+        ("4-", [3, 4]),
+        ("-2", [0, 1]),
+        ("2,,end", [1, 4]),
+        (" 1 , 3 ,", [0, 2]),
+        ("odd", [0, 2, 4]),
+        ("even", [1, 3]),
+        ("ALL", [0, 1, 2, 3, 4]),
+        ("2,2", [1, 1]),
+    ],
+)
+def test_parse_page_ranges(expression, expected):
+    assert parse_page_ranges(expression, 5) == expected
+
+
+@pytest.mark.parametrize("expression", ["0", "6", "1-6", "end-0", "a", "1-2-3", "-", "", ",", " , "])
+def test_parse_page_ranges_rejects(expression):
+    with pytest.raises(ValueError):
+        parse_page_ranges(expression, 5)
+
+
+def test_parse_page_ranges_empty_document():
+    with pytest.raises(ValueError):
+        parse_page_ranges("all", 0)
+
+
+def test_extract_round_trip(sample_pdf, tmp_path):
+    output = str(tmp_path / "out" / "extract.pdf")
+    report = str(tmp_path / "report.jsonl")
+    assert main(["extract", sample_pdf, "--pages", "end-4,1", "-o", output, "--report", report]) == 0
+    assert page_texts(output) == ["Page 5", "Page 4", "Page 1"]
+    with open(report, encoding="utf-8") as handle:
+        job, summary = [json.loads(line) for line in handle]
+    assert job["ok"] and job["pages"] == 5
+    assert (summary["jobs"], summary["failed"]) == (1, 0)
+
+
+def test_reorder_and_rotate_round_trip(sample_pdf, tmp_path):
+    reordered = str(tmp_path / "reordered.pdf")
+    rotated = str(tmp_path / "rotated.pdf")
+    report = str(tmp_path / "report.jsonl")
+    assert main(["reorder", sample_pdf, "--order", "end-1", "-o", reordered, "--report", report]) == 0
+    assert page_texts(reordered) == [f"Page {number}" for number in range(5, 0, -1)]
+    assert main(["rotate", reordered, "--pages", "odd", "--angle", "270", "-o", rotated, "--report", report]) == 0
+    doc = fitz.open(rotated)
+    try:
+        assert [page.rotation for page in doc] == [270, 0, 270, 0, 270]
+    finally:
+        doc.close()
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["extract", "{pdf}", "--pages", "7", "-o", "{out}"],
+        ["extract", "{pdf}", "--pages", ",", "-o", "{out}"],
+        ["reorder", "{pdf}", "--order", "1-2", "-o", "{out}"],
+        ["rotate", "{pdf}", "--angle", "45", "-o", "{out}"],
+        ["insert", "{pdf}", "{pdf}", "--after", "9", "-o", "{out}"],
+        ["merge", "{missing}", "-o", "{out}"],
+    ],
+)
+def test_bad_input_exits_with_one(sample_pdf, tmp_path, argv):
+    output = str(tmp_path / "bad.pdf")
+    report = str(tmp_path / "report.jsonl")
+    paths = {"pdf": sample_pdf, "out": output, "missing": str(tmp_path / "missing.pdf")}
+    assert main([arg.format(**paths) for arg in argv] + ["--report", report]) == 1
+    with open(report, encoding="utf-8") as handle:
+        job, summary = [json.loads(line) for line in handle]
+    assert not job["ok"] and job["error"]
+    assert summary["failed"] == 1
+
+
+def test_manifest_reports_each_job(sample_pdf, tmp_path):
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text(
+        "\n".join(
+            [
+                "# comment lines are skipped",
+                json.dumps({"op": "extract", "input": "sample.pdf", "pages": "2-3", "output": "a.pdf"}),
+                json.dumps({"op": "extract", "input": "sample.pdf", "pages": "9", "output": "b.pdf"}),
+            ]
+        ),
+        encoding="utf-8",
+    )
+    report = str(tmp_path / "report.jsonl")
+    assert main(["run", str(manifest), "--workers", "1", "--report", report]) == 1
+    with open(report, encoding="utf-8") as handle:
+        records = [json.loads(line) for line in handle]
+    assert [record["ok"] for record in records[:-1]] == [True, False]
+    assert page_texts(str(tmp_path / "a.pdf")) == ["Page 2", "Page 3"]
+    assert main(["run", str(tmp_path / "missing.jsonl"), "--report", report]) == 2
@@ -0,0 +1,85 @@
+import os
+
+import fitz
+import pytest
+
+from history import UndoHistory
+from pdf_engine import LazyPdfEngine
+
+
+class BlobEngine:
+    def __init__(self):
+        self.recorder = None
+        self.state = b""
+
+    def set_state(self, data):
+        previous = self.state
+        self.state = data
+        self.recorder.record("set_state", previous)
+        return True, ""
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    path = str(tmp_path / "sample.pdf")
+    doc = fitz.open()
+    for number in range(20):
+        doc.new_page().insert_text((72, 72), f"Page {number + 1}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_spill_file_is_compacted_while_blobs_stay_live(tmp_path):
+    history = UndoHistory(memory_budget=4096, compress_level=0, spill_dir=str(tmp_path))
+    history.compact_slack = 64 * 1024
+    engine = BlobEngine()
+    history.attach(engine)
+    engine.set_state(os.urandom(16 * 1024))
+    history.begin()
+    engine.set_state(b"pinned")
+    for _ in range(200):
+        history.begin()
+        engine.set_state(os.urandom(16 * 1024))
+        history._clear_stack(history.undo_stack[1:-1])
+        del history.undo_stack[1:-1]
+
+    assert history.disk_bytes > 0
+    assert history.spill_bytes <= 2 * history.disk_bytes + history.compact_slack
+    first = history.undo_stack[0][0][1][0]
+    assert history._load_blob(first) == b""
+    while history.can_undo():
+        ok, err = history.undo()
+        assert ok, err
+    assert engine.state == b""
+
+
+def test_lazy_engine_log_is_measured_and_released(sample_pdf):
+    engine = LazyPdfEngine()
+    history = UndoHistory()
+    history.attach(engine)
+    ok, err = engine.open(sample_pdf)
+    assert ok, err
+    assert history.footprint()["log_bytes"] == 0
+    history.begin()
+    engine.remove_pages(list(range(10)))
+    history.begin()
+    engine.reorder_pages(list(reversed(range(engine.page_count()))))
+    assert history.footprint()["log_bytes"] > 0
+    assert history.footprint()["memory_bytes"] == 0
+    history.clear()
+    assert history.footprint()["log_bytes"] == 0
+    engine.close()
+
+
+def test_log_budget_drops_oldest_entries(sample_pdf):
+    engine = LazyPdfEngine()
+    history = UndoHistory(memory_budget=4096)
+    history.attach(engine)
+    engine.open(sample_pdf)
+    for _ in range(50):
+        history.begin()
+        engine.reorder_pages(list(reversed(range(engine.page_count()))))
+    assert history.log_bytes <= 4096 or len(history.undo_stack) == 1
+    assert 1 <= len(history.undo_stack) < 50
+    engine.close()
@@ -0,0 +1,204 @@
+import os
+import random
+import shutil
+
+import fitz
+import pytest
+
+from history import UndoHistory
+from pdf_engine import LazyPdfEngine, PdfEngine
+from preflight import repair_pdf
+
+
+def build_pdf(path, label, count):
+    doc = fitz.open()
+    for number in range(count):
+        page = doc.new_page(width=300 + 20 * number, height=400)
+        page.insert_text((40, 60), f"{label}{number + 1}", fontsize=20)
+        if number % 3 == 1:
+            page.set_rotation(90)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def describe_file(path):
+    doc = fitz.open(path)
+    try:
+        return [
+            (page.get_text().strip(), page.rotation, round(page.mediabox.width), round(page.mediabox.height))
+            for page in doc
+        ]
+    finally:
+        doc.close()
+
+
+def describe(engine, path):
+    ok, err = engine.save(path)
+    assert ok, err
+    return describe_file(path)
+
+
+def snapshot(engine):
+    return [(engine.page_rotation(i), engine.page_size(i)) for i in range(engine.page_count())]
+
+
+@pytest.fixture
+def files(tmp_path):
+    return {
+        "main": build_pdf(str(tmp_path / "main.pdf"), "A", 8),
+        "other": build_pdf(str(tmp_path / "other.pdf"), "B", 3),
+        "out": str(tmp_path / "out"),
+    }
+
+
+def open_pair(path):
+    engines = []
+    for engine in (PdfEngine(), LazyPdfEngine()):
+        history = UndoHistory()
+        history.attach(engine)
+        ok, err = engine.open(path)
+        assert ok, err
+        engines.append((engine, history))
+    return engines
+
+
+def random_op(rng, count, other):
+    choice = rng.randrange(7)
+    if choice == 0:
+        return "rotate_page_by", (rng.randrange(count), rng.choice((90, 180, 270)))
+    if choice == 1:
+        return "move_page", (rng.randrange(count), rng.randrange(count + 1))
+    if choice == 2:
+        order = list(range(count))
+        rng.shuffle(order)
+        return "reorder_pages", (order,)
+    if choice == 3 and count > 1:
+        return "remove_pages", (rng.sample(range(count), rng.randrange(1, count)),)
+    if choice == 4 and count > 1:
+        return "keep_pages", (rng.sample(range(count), rng.randrange(1, count)),)
+    if choice == 5 and count > 1:
+        return "delete_page", (rng.randrange(count),)
+    return "insert_pdf_at", (other, rng.randrange(count + 1))
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_random_edits_match_eager_engine(files, seed):
+    rng = random.Random(seed)
+    pair = open_pair(files["main"])
+    for _step in range(25):
+        name, args = random_op(rng, pair[0][0].page_count(), files["other"])
+        for engine, history in pair:
+            history.begin()
+            ok, err = getattr(engine, name)(*args)
+            assert ok, (name, args, err)
+        assert snapshot(pair[0][0]) == snapshot(pair[1][0])
+
+    for step in range(2):
+        expected = [describe(engine, f"{files['out']}-{seed}-{step}-{kind}.pdf") for kind, (engine, _) in enumerate(pair)]
+        assert expected[0] == expected[1]
+        for _ in range(rng.randrange(1, 10)):
+            for _engine, history in pair:
+                ok, err = history.undo()
+                assert ok, err
+            assert snapshot(pair[0][0]) == snapshot(pair[1][0])
+        for _ in range(rng.randrange(0, 4)):
+            for _engine, history in pair:
+                if history.can_redo():
+                    ok, err = history.redo()
+                    assert ok, err
+            assert snapshot(pair[0][0]) == snapshot(pair[1][0])
+
+    while pair[0][1].can_undo():
+        for _engine, history in pair:
+            ok, err = history.undo()
+            assert ok, err
+    assert describe(pair[1][0], files["out"] + "-start.pdf") == describe_file(files["main"])
+    for engine, _history in pair:
+        engine.close()
+
+
+def test_save_over_open_source_keeps_editing_and_undo(files):
+    engine = LazyPdfEngine()
+    history = UndoHistory()
+    history.attach(engine)
+    engine.open(files["main"])
+    original = describe_file(files["main"])
+    history.begin()
+    engine.insert_pdf_at(files["other"], 2)
+    history.begin()
+    engine.remove_pages([0, 5])
+    history.begin()
+    engine.rotate_page_by(1, 90)
+    expected = describe(engine, files["out"] + "-expected.pdf")
+
+    ok, err = engine.save(files["main"], "compact")
+    assert ok, err
+    assert not engine.save_report["incremental"]
+    assert describe_file(files["main"]) == expected
+    assert engine.page_count() == len(expected)
+
+    while history.can_undo():
+        ok, err = history.undo()
+        assert ok, err
+    assert describe(engine, files["out"] + "-undone.pdf") == original
+    engine.close()
+
+
+def test_incremental_save_only_touches_rotations(files):
+    engine = LazyPdfEngine()
+    engine.open(files["main"])
+    engine.rotate_page_by(2, 90)
+    engine.rotate_page_by(4, 270)
+    assert engine.can_save_incrementally(files["main"], "fast")
+    expected = describe(engine, files["out"] + "-expected.pdf")
+    ok, err = engine.save(files["main"], "fast")
+    assert ok, err
+    assert engine.save_report["incremental"]
+    assert describe_file(files["main"]) == expected
+    engine.rotate_page_by(2, 90)
+    assert engine.page_rotation(2) == (expected[2][1] + 90) % 360
+    engine.remove_pages([0])
+    assert not engine.can_save_incrementally(files["main"], "fast")
+    engine.close()
+
+
+def test_clip_paste_survives_source_overwrite(files):
+    engine = LazyPdfEngine()
+    engine.open(files["main"])
+    engine.rotate_page_by(3, 180)
+    copied = describe(engine, files["out"] + "-before.pdf")
+    clip = engine.clip_pages([1, 3])
+    engine.remove_pages([1, 3])
+    ok, err = engine.save(files["main"])
+    assert ok, err
+    ok, err = engine.paste_clip(clip, 0)
+    assert ok, err
+    engine.release_clip(clip)
+    assert describe(engine, files["out"] + "-after.pdf")[:2] == [copied[1], copied[3]]
+    engine.close()
+
+
+def test_adopt_repaired_source_keeps_pages(files, tmp_path):
+    damaged = str(tmp_path / "damaged.pdf")
+    shutil.copy(files["main"], damaged)
+    with open(damaged, "rb") as handle:
+        data = handle.read()
+    marker = data.rindex(b"startxref")
+    with open(damaged, "wb") as handle:
+        handle.write(data[:marker] + b"startxref\n999999\n%%EOF\n")
+
+    engine = LazyPdfEngine()
+    ok, err = engine.open(damaged)
+    assert ok, err
+    engine.rotate_page_by(0, 90)
+    before = describe(engine, files["out"] + "-before.pdf")
+    tasks = engine.repair_tasks()
+    assert len(tasks) == 1
+    result = repair_pdf(tasks[0])
+    assert result[0], result[1]
+    assert engine.adopt_repaired(tasks[0], result)
+    assert engine.repair_tasks() == []
+    assert describe(engine, files["out"] + "-after.pdf") == before
+    assert os.path.exists(damaged)
+    engine.close()
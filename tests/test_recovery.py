@@ -0,0 +1,141 @@
+import os
+
+import fitz
+import pytest
+
+from pdf_engine import LazyPdfEngine
+from recovery import RecoveryJournal, _lock_path, _try_lock
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    path = str(tmp_path / "sample.pdf")
+    doc = fitz.open()
+    for number in range(12):
+        doc.new_page().insert_text((72, 72), f"Page {number + 1}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def state_of(engine):
+    return [(engine.page_fingerprint(i), engine.page_rotation(i)) for i in range(engine.page_count())]
+
+
+EDITS = [
+    ("rotate_page_by", (0, 90)),
+    ("move_page", (5, 1)),
+    ("remove_pages", ([2, 3],)),
+    ("reorder_pages", (list(reversed(range(10))),)),
+    ("delete_page", (4,)),
+    ("rotate_page_by", (2, 180)),
+]
+
+
+def crash(journal):
+    journal.sync()
+    journal.handle.close()
+    journal.lock.close()
+    journal.handle = journal.lock = None
+
+
+def edited_engine(path, journal=None, edits=EDITS):
+    engine = LazyPdfEngine()
+    if journal is not None:
+        journal.attach(engine)
+    ok, err = engine.open(path)
+    assert ok, err
+    for name, args in edits:
+        ok, err = getattr(engine, name)(*args)
+        assert ok, (name, err)
+    return engine
+
+
+def test_replay_after_crash_restores_every_edit(tmp_path, sample_pdf):
+    journal = RecoveryJournal(folder=str(tmp_path / "recovery"))
+    engine = edited_engine(sample_pdf, journal)
+    expected = state_of(engine)
+    crash(journal)
+
+    orphans = RecoveryJournal(folder=journal.folder).orphans()
+    assert orphans == [journal.path]
+    state, operations = RecoveryJournal.load(orphans[0])
+    assert state["dirty"]
+    assert len(operations) == len(EDITS) - 1
+
+    restored = LazyPdfEngine()
+    ok, err = restored.restore_session(state, operations)
+    assert ok, err
+    assert state_of(restored) == expected
+    assert restored.path == sample_pdf
+    engine.close()
+    restored.close()
+
+
+def test_truncated_last_record_replays_up_to_last_complete_entry(tmp_path, sample_pdf):
+    journal = RecoveryJournal(folder=str(tmp_path / "recovery"))
+    engine = edited_engine(sample_pdf, journal)
+    crash(journal)
+    with open(journal.path, "rb") as handle:
+        data = handle.read()
+    with open(journal.path, "wb") as handle:
+        handle.write(data[: len(data) - 6])
+
+    state, operations = RecoveryJournal.load(journal.path)
+    assert len(operations) == len(EDITS) - 2
+    restored = LazyPdfEngine()
+    ok, err = restored.restore_session(state, operations)
+    assert ok, err
+    assert state_of(restored) == state_of(edited_engine(sample_pdf, edits=EDITS[:-1]))
+    engine.close()
+    restored.close()
+
+
+def test_stale_lock_is_offered_and_live_session_is_not(tmp_path, sample_pdf):
+    folder = str(tmp_path / "recovery")
+    live = RecoveryJournal(folder=folder)
+    live_engine = edited_engine(sample_pdf, live, EDITS[:2])
+    crashed = RecoveryJournal(folder=folder)
+    crashed_engine = edited_engine(sample_pdf, crashed, EDITS[:3])
+    crash(crashed)
+
+    with open(_lock_path(crashed.path), "a+") as lock:
+        assert _try_lock(lock)
+    assert RecoveryJournal(folder=folder).orphans() == [crashed.path]
+
+    RecoveryJournal.remove(crashed.path)
+    assert RecoveryJournal(folder=folder).orphans() == []
+    live_engine.close()
+    crashed_engine.close()
+    live.close()
+
+
+def test_checkpoint_after_save_and_close_leave_nothing_to_recover(tmp_path, sample_pdf):
+    journal = RecoveryJournal(folder=str(tmp_path / "recovery"))
+    engine = edited_engine(sample_pdf, journal)
+    ok, err = engine.save(str(tmp_path / "saved.pdf"))
+    assert ok, err
+    journal.sync()
+    assert RecoveryJournal.load(journal.path) is None
+    engine.rotate_page_by(0, 90)
+    journal.sync()
+    state, operations = RecoveryJournal.load(journal.path)
+    assert operations == [["rotate_page_by", [0, 90]]]
+    path = journal.path
+    engine.close()
+    journal.close()
+    assert RecoveryJournal(folder=journal.folder).orphans() == []
+    assert not os.path.exists(path)
+
+
+def test_records_are_fsynced_in_batches(tmp_path, sample_pdf):
+    journal = RecoveryJournal(folder=str(tmp_path / "recovery"), batch_size=3)
+    engine = edited_engine(sample_pdf, journal, EDITS[:1])
+    assert journal.pending == 0
+    engine.rotate_page_by(1, 90)
+    engine.rotate_page_by(2, 90)
+    assert journal.pending == 2
+    engine.rotate_page_by(3, 90)
+    assert journal.pending == 0
+    engine.close()
+    journal.close()
@@ -0,0 +1,134 @@
+import fitz
+import pytest
+
+from editor_ui import PdfEditorApp
+from page_viewer import PageViewer
+from pdf_engine import LazyPdfEngine
+from ui_components import UIComponents
+
+
+class FakeCanvas:
+    def __init__(self):
+        self.items = 0
+
+    def winfo_width(self):
+        return 600
+
+    def winfo_height(self):
+        return 800
+
+    def canvasx(self, value):
+        return value
+
+    def canvasy(self, value):
+        return value
+
+    def configure(self, **options):
+        pass
+
+    config = configure
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def update_idletasks(self):
+        pass
+
+    def xview_moveto(self, fraction):
+        pass
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def delete(self, *items):
+        pass
+
+
+class FakeRenderer:
+    def __init__(self):
+        self.tasks = []
+
+    def request(self, task, callback, priority=0):
+        self.tasks.append(task)
+
+    def cancel(self, task, callback=None):
+        pass
+
+
+class Stub:
+    def __init__(self, **names):
+        self.__dict__.update(names)
+
+
+class FakeApp:
+    def __init__(self, path):
+        self.engine = LazyPdfEngine()
+        ok, err = self.engine.open(path)
+        assert ok, err
+        self.renderer = FakeRenderer()
+        self.viewer = PageViewer(self)
+        self.viewer_canvas = FakeCanvas()
+        self.viewer.attach(self.viewer_canvas, Stub(set=lambda *a: None), Stub(set=lambda *a: None))
+        self.ui = UIComponents(self)
+        self.viewer_page_index = None
+        self.viewer_zoom = 1.0
+        self.selected_indices = set()
+        self.dnd = Stub(clear_drag_state=lambda: None)
+        self.thumbnails = Stub(apply_order=lambda order: None)
+        self._refresh_undo_redo = lambda: None
+        self._refresh_selection_styles = lambda: None
+        self._jobs = 0
+
+    def after(self, delay, callback):
+        self._jobs += 1
+        return self._jobs
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, job):
+        pass
+
+    def apply_page_order(self, order):
+        PdfEditorApp._apply_page_order(self, order)
+
+
+@pytest.fixture
+def app(tmp_path):
+    path = str(tmp_path / "pages.pdf")
+    doc = fitz.open()
+    for number in range(10):
+        doc.new_page(width=200 + number * 10, height=300).insert_text((20, 40), f"Page {number + 1}")
+    doc.save(path)
+    doc.close()
+    app = FakeApp(path)
+    yield app
+    app.engine.close()
+
+
+def test_delete_then_zoom_follows_viewed_page(app):
+    app.ui.show_page_in_viewer(9)
+    remaining = list(range(1, 10))
+    ok, err = app.engine.keep_pages(remaining)
+    assert ok, err
+    app.apply_page_order(remaining)
+
+    assert app.viewer_page_index == 8
+    assert app.viewer.page_index == 8
+    app.renderer.tasks.clear()
+    app.viewer.zoom_to(2.0)
+    app.viewer._commit_zoom()
+    assert app.renderer.tasks
+    assert {task[1] for task in app.renderer.tasks} == {9}
+
+
+def test_deleting_viewed_page_clears_viewer(app):
+    app.ui.show_page_in_viewer(0)
+    remaining = list(range(1, 10))
+    ok, err = app.engine.keep_pages(remaining)
+    assert ok, err
+    app.apply_page_order(remaining)
+
+    assert app.viewer_page_index is None
+    assert app.viewer.page_index is None
+    app.viewer.zoom_to(2.0)
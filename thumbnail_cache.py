@@ -0,0 +1,61 @@
+from collections import OrderedDict
+
+
+class ThumbnailCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        image = self.entries.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, key, image):
+        size = self._image_bytes(image)
+        if size > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= self._image_bytes(old)
+        self.entries[key] = image
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size_bytes -= self._image_bytes(evicted)
+            self.evictions += 1
+
+    def discard(self, predicate):
+        for key in [key for key in self.entries if predicate(key)]:
+            self.size_bytes -= self._image_bytes(self.entries.pop(key))
+
+    def clear(self):
+        self.entries.clear()
+        self.size_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _image_bytes(self, image):
+        width, height = image.size
+        return width * height * len(image.getbands())
@@ -0,0 +1,342 @@
+import customtkinter as ctk
+from PIL import Image
+
+from tracing import tracer
+
+
+class ThumbnailPanel:
+    def __init__(self, app):
+        self.app = app
+        self.scroll_frame = None
+        self.canvas = None
+        self.scrollbar = None
+        self.extent_item = None
+        self.cells = []
+        self.page_count = 0
+        self.columns = 1
+        self.box_size = (1, 1)
+        self.cell_size = (1, 1)
+        self.pitch = (1, 1)
+        self.margin = 0
+        self.overscan_rows = 2
+        self.placeholder = None
+        self._canvas_width = 0
+        self._view = None
+        self._refresh_job = None
+
+    def attach(self, scroll_frame):
+        self.scroll_frame = scroll_frame
+        self.canvas = scroll_frame._parent_canvas
+        self.scrollbar = getattr(scroll_frame, "_scrollbar", None)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+        self.canvas.bind("<Configure>", self._on_canvas_configure, add="+")
+        self.extent_item = self.canvas.create_rectangle(0, 0, 0, 0, outline="", width=0)
+
+    def _on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        self._view = None
+        self.schedule_refresh()
+
+    def _on_canvas_configure(self, event):
+        self._view = None
+        if event.width != self._canvas_width:
+            self._canvas_width = event.width
+            self.relayout()
+        else:
+            self.schedule_refresh()
+
+    def _scale(self, value):
+        return self.scroll_frame._apply_widget_scaling(value)
+
+    def reset(self):
+        app = self.app
+        self.unbind_all()
+        self.page_count = app.engine.page_count()
+        app.page_widgets[:] = [None] * self.page_count
+        self._measure()
+        self.canvas.yview_moveto(0)
+        self.relayout()
+
+    def clear(self):
+        self.unbind_all()
+        self.page_count = 0
+        self.app.page_widgets.clear()
+        self._update_extent()
+
+    def apply_order(self, order):
+        app = self.app
+        new_positions = {source: index for index, source in enumerate(order) if source is not None}
+        self.page_count = len(order)
+        app.page_widgets[:] = [None] * self.page_count
+        for cell in self.cells:
+            old_index = cell["index"]
+            if old_index is None:
+                continue
+            new_index = new_positions.get(old_index)
+            if new_index is None:
+                self._unbind(cell)
+                continue
+            app.page_widgets[new_index] = cell
+            if new_index != old_index:
+                cell["index"] = new_index
+                self._place(cell)
+                cell["page_label"].configure(text=f"페이지 {new_index + 1}")
+        self._update_extent()
+        self.refresh()
+
+    def _measure(self):
+        width, height = self.app.engine.page_size(0)
+        scale = self.app.thumbnail_scale
+        self.box_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        self.placeholder = None
+
+    def relayout(self):
+        if self.canvas is None:
+            return
+        box_w, box_h = self.box_size
+        pad = self._scale(12)
+        min_width = self._scale(box_w + 24)
+        available = max(self.canvas.winfo_width(), min_width + 2 * pad)
+        columns = int((available - pad) // (min_width + pad))
+        self.columns = max(1, min(columns, self.app.max_columns))
+        cell_w = (available - pad * (self.columns + 1)) / self.columns
+        cell_h = self._scale(box_h + 60)
+        self.margin = pad
+        self.cell_size = (int(max(min_width, cell_w)), int(cell_h))
+        self.pitch = (self.cell_size[0] + pad, self.cell_size[1] + 2 * pad)
+        self._view = None
+        for cell in self.cells:
+            if cell["index"] is not None:
+                self._place(cell)
+        self._update_extent()
+        self.refresh()
+
+    def _update_extent(self):
+        if self.canvas is None:
+            return
+        rows = (self.page_count + self.columns - 1) // self.columns
+        height = rows * self.pitch[1] if rows else 0
+        self.canvas.coords(self.extent_item, 0, 0, 1, height)
+        self.app._update_scrollregion()
+
+    def cell_origin(self, index):
+        row, column = divmod(index, self.columns)
+        return self.margin + column * self.pitch[0], self.margin + row * self.pitch[1]
+
+    def invalidate_geometry(self):
+        self._view = None
+
+    def _view_geometry(self):
+        if self._view is None:
+            top = self.canvas.canvasy(0)
+            left = self.canvas.canvasx(0)
+            self._view = (
+                self.canvas.winfo_rootx() - left,
+                self.canvas.winfo_rooty() - top,
+                top,
+                top + self.canvas.winfo_height(),
+            )
+        return self._view
+
+    def to_canvas(self, x_root, y_root):
+        origin_x, origin_y, _top, _bottom = self._view_geometry()
+        return x_root - origin_x, y_root - origin_y
+
+    def closest_index(self, x_root, y_root):
+        if self.page_count == 0 or self.canvas is None:
+            return None
+        x, y = self.to_canvas(x_root, y_root)
+        _origin_x, _origin_y, top, bottom = self._view_geometry()
+        y = min(max(y, top), bottom)
+        column = round((x - self.margin - self.cell_size[0] / 2) / self.pitch[0])
+        row = round((y - self.margin - self.cell_size[1] / 2) / self.pitch[1])
+        column = min(max(column, 0), self.columns - 1)
+        row = min(max(row, 0), (self.page_count - 1) // self.columns)
+        index = row * self.columns + column
+        if index < self.page_count:
+            return index
+        candidates = [self.page_count - 1]
+        if index - self.columns >= 0:
+            candidates.append(index - self.columns)
+        return min(candidates, key=lambda candidate: self._center_distance(candidate, x, y))
+
+    def _center_distance(self, index, x, y):
+        left, top = self.cell_origin(index)
+        return (left + self.cell_size[0] / 2 - x) ** 2 + (top + self.cell_size[1] / 2 - y) ** 2
+
+    def is_after_center(self, index, x_root):
+        x, _y = self.to_canvas(x_root, 0)
+        return x >= self.cell_origin(index)[0] + self.cell_size[0] / 2
+
+    def visible_range(self, overscan=None):
+        if overscan is None:
+            overscan = self.overscan_rows
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first_row = max(0, int(top // self.pitch[1]) - overscan)
+        last_row = int(bottom // self.pitch[1]) + overscan
+        first = first_row * self.columns
+        last = min(self.page_count - 1, (last_row + 1) * self.columns - 1)
+        return first, last
+
+    def schedule_refresh(self):
+        if self._refresh_job is None:
+            self._refresh_job = self.app.after_idle(self.refresh)
+
+    def refresh(self):
+        if self._refresh_job is not None:
+            self.app.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        if self.page_count == 0 or self.canvas is None:
+            return
+        first, last = self.visible_range()
+        free = []
+        for cell in self.cells:
+            index = cell["index"]
+            if index is not None and not first <= index <= last:
+                self._unbind(cell)
+            if cell["index"] is None:
+                free.append(cell)
+        page_widgets = self.app.page_widgets
+        shown_first, shown_last = self.visible_range(overscan=0)
+        for index in range(first, last + 1):
+            if page_widgets[index] is None:
+                cell = free.pop() if free else self._create_cell()
+                tier = 0 if shown_first <= index <= shown_last else 1
+                self._bind(cell, index, (tier, index))
+
+    def _create_cell(self):
+        app = self.app
+        frame = ctk.CTkFrame(self.canvas, corner_radius=10)
+        frame.grid_columnconfigure(0, weight=1)
+
+        image_label = ctk.CTkLabel(frame, text="")
+        image_label.grid(row=0, column=0, padx=12, pady=(12, 8))
+
+        page_label = ctk.CTkLabel(frame, text="", font=app.ui_font)
+        page_label.grid(row=1, column=0, padx=12, pady=(0, 12))
+
+        cell = {
+            "frame": frame,
+            "image": None,
+            "default_fg": frame.cget("fg_color"),
+            "pil_image": None,
+            "image_label": image_label,
+            "page_label": page_label,
+            "index": None,
+            "render_key": None,
+            "render_callback": None,
+            "window": self.canvas.create_window(0, 0, anchor="nw", window=frame, state="hidden"),
+        }
+        app._bind_drag_events(frame, image_label, page_label, cell)
+        app._register_drag_source(frame, cell)
+        self.cells.append(cell)
+        return cell
+
+    def _place(self, cell):
+        x, y = self.cell_origin(cell["index"])
+        self.canvas.coords(cell["window"], x, y)
+        self.canvas.itemconfigure(
+            cell["window"],
+            width=self.cell_size[0],
+            height=self.cell_size[1],
+            state="normal",
+        )
+
+    def _bind(self, cell, index, priority=(0, 0)):
+        app = self.app
+        cell["index"] = index
+        app.page_widgets[index] = cell
+        self._place(cell)
+        cell["page_label"].configure(text=f"페이지 {index + 1}")
+        self._request_image(cell, index, priority, placeholder=True)
+        app._apply_selection_style(cell["frame"], cell["default_fg"], index in app.selected_indices)
+
+    def _unbind(self, cell):
+        index = cell["index"]
+        if index is not None and index < len(self.app.page_widgets):
+            if self.app.page_widgets[index] is cell:
+                self.app.page_widgets[index] = None
+        cell["index"] = None
+        cell["pil_image"] = None
+        self._cancel_request(cell)
+        self.canvas.itemconfigure(cell["window"], state="hidden")
+
+    def unbind_all(self):
+        for cell in self.cells:
+            if cell["index"] is not None:
+                self._unbind(cell)
+
+    def refresh_page(self, index):
+        if index < 0 or index >= len(self.app.page_widgets):
+            return
+        cell = self.app.page_widgets[index]
+        if cell is None:
+            return
+        self._request_image(cell, index)
+
+    def _thumbnail_scale(self, index):
+        width, height = self.app.engine.page_size(index)
+        box_w, box_h = self.box_size
+        return min(self.app.thumbnail_scale, box_w / max(1.0, width), box_h / max(1.0, height))
+
+    def _request_image(self, cell, index, priority=(0, 0), placeholder=False):
+        self._cancel_request(cell)
+        engine = self.app.engine
+        scale = round(self._thumbnail_scale(index), 4)
+        key = (engine.page_fingerprint(index), engine.page_rotation(index), scale)
+        image = self.app.thumbnail_cache.get(key)
+        if image is None:
+            image = self.app.thumbnail_store.get(key)
+            if image is not None:
+                tracer.count("thumbnails.disk_hit")
+                self.app.thumbnail_cache.put(key, image)
+        else:
+            tracer.count("thumbnails.memory_hit")
+        if image is not None:
+            self._show_image(cell, image)
+            return
+        if placeholder:
+            self._show_image(cell, None)
+        task = engine.render_task(index, scale)
+        if task is None:
+            return
+        callback = lambda result, cell=cell, task=task, key=key: self._on_rendered(cell, task, key, result)
+        cell["render_key"] = task
+        cell["render_callback"] = callback
+        tracer.count("thumbnails.render")
+        self.app.renderer.request(task, callback, priority)
+
+    def _cancel_request(self, cell):
+        if cell["render_key"] is not None:
+            self.app.renderer.cancel(cell["render_key"], cell["render_callback"])
+        cell["render_key"] = None
+        cell["render_callback"] = None
+
+    def _on_rendered(self, cell, task, key, result):
+        if result is None:
+            return
+        mode, width, height, samples = result
+        image = Image.frombytes(mode, (width, height), samples)
+        self.app.thumbnail_cache.put(key, image)
+        self.app.thumbnail_store.put(key, image)
+        if cell["render_key"] != task:
+            return
+        cell["render_key"] = None
+        cell["render_callback"] = None
+        self._show_image(cell, image)
+
+    def _placeholder_image(self):
+        if self.placeholder is None:
+            self.placeholder = Image.new("RGB", self.box_size, "#3A3A3A")
+        return self.placeholder
+
+    def _show_image(self, cell, image):
+        if image is not None:
+            self.app._on_first_paint()
+        shown = image if image is not None else self._placeholder_image()
+        ctk_image = ctk.CTkImage(light_image=shown, dark_image=shown, size=shown.size)
+        cell["image"] = ctk_image
+        cell["pil_image"] = image
+        cell["image_label"].configure(image=ctk_image)
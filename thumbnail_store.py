@@ -0,0 +1,150 @@
+import io
+import os
+import sqlite3
+import time
+
+from PIL import Image
+
+from app_paths import data_dir
+
+
+class ThumbnailStore:
+    def __init__(self, path=None, max_bytes=256 * 1024 * 1024, batch_size=64):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.db = None
+        self.failed = max_bytes <= 0
+        self.pending = {}
+        self.touched = set()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_environment(cls):
+        options = {}
+        try:
+            options["max_bytes"] = int(os.environ["PDF_EDITOR_THUMBNAIL_CACHE_MB"]) * 1024 * 1024
+        except (KeyError, ValueError):
+            pass
+        return cls(**options)
+
+    def _connect(self):
+        if self.db is None and not self.failed:
+            try:
+                if self.path is None:
+                    self.path = os.path.join(data_dir("thumbnails"), "thumbnails.sqlite3")
+                db = sqlite3.connect(self.path, timeout=1.0)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute("CREATE TABLE IF NOT EXISTS thumbnails (key TEXT PRIMARY KEY, data BLOB, size INTEGER, used REAL)")
+                db.execute("CREATE INDEX IF NOT EXISTS thumbnails_used ON thumbnails (used)")
+                self.size_bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM thumbnails").fetchone()[0]
+                self.db = db
+            except (sqlite3.Error, OSError):
+                self.failed = True
+        return self.db
+
+    def _key(self, key):
+        if key[0] is None:
+            return None
+        return "|".join(str(part) for part in key)
+
+    def get(self, key):
+        key = self._key(key)
+        if key is None:
+            return None
+        data = self.pending.get(key)
+        if data is None:
+            db = self._connect()
+            if db is None:
+                return None
+            try:
+                row = db.execute("SELECT data FROM thumbnails WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            data = row[0]
+            self.touched.add(key)
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return image
+
+    def put(self, key, image):
+        key = self._key(key)
+        if key is None or self.failed:
+            return
+        buffer = io.BytesIO()
+        if image.mode == "RGB":
+            image.save(buffer, "JPEG", quality=85)
+        else:
+            image.save(buffer, "PNG")
+        self.pending[key] = buffer.getvalue()
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending and not self.touched:
+            return
+        pending, touched = self.pending, self.touched
+        self.pending, self.touched = {}, set()
+        db = self._connect()
+        if db is None:
+            return
+        now = time.time()
+        try:
+            with db:
+                for key, data in pending.items():
+                    cursor = db.execute(
+                        "INSERT OR IGNORE INTO thumbnails (key, data, size, used) VALUES (?, ?, ?, ?)",
+                        (key, data, len(data), now),
+                    )
+                    if cursor.rowcount > 0:
+                        self.size_bytes += len(data)
+                db.executemany("UPDATE thumbnails SET used = ? WHERE key = ?", [(now, key) for key in touched])
+                if self.size_bytes > self.max_bytes:
+                    self._evict(db)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, db):
+        target = self.max_bytes * 0.9
+        while self.size_bytes > target:
+            rows = db.execute("SELECT key, size FROM thumbnails ORDER BY used LIMIT 256").fetchall()
+            if not rows:
+                self.size_bytes = 0
+                return
+            keys = []
+            for key, size in rows:
+                keys.append((key,))
+                self.size_bytes -= size
+                self.evictions += 1
+                if self.size_bytes <= target:
+                    break
+            db.executemany("DELETE FROM thumbnails WHERE key = ?", keys)
+
+    def close(self):
+        self.flush()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "pending": len(self.pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
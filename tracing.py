@@ -0,0 +1,167 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from app_paths import data_dir
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._finish(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self, max_events=100000, window=512):
+        self.enabled = False
+        self.export_on_exit = False
+        self.events = deque(maxlen=max_events)
+        self.window = window
+        self.counters = {}
+        self.histograms = {}
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def configure_from_environment(self):
+        value = os.environ.get("PDF_EDITOR_TRACE", "")
+        if value and value != "0":
+            self.enabled = True
+            self.export_on_exit = True
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.counters.clear()
+            self.histograms.clear()
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            total = self.counters.get(name, 0) + value
+            self.counters[name] = total
+            self.events.append({"name": name, "ph": "C", "ts": self._micros(time.perf_counter()), "args": {"value": total}})
+
+    def observe(self, name, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._observe(name, value)
+
+    def _observe(self, name, value):
+        values = self.histograms.get(name)
+        if values is None:
+            values = self.histograms[name] = deque(maxlen=self.window)
+        values.append(value)
+
+    def _micros(self, moment):
+        return round((moment - self.origin) * 1000000, 1)
+
+    def _finish(self, name, start, end, args):
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": self._micros(start),
+            "dur": round((end - start) * 1000000, 1),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+            self._observe(name, (end - start) * 1000)
+
+    def summary(self):
+        with self.lock:
+            histograms = {name: sorted(values) for name, values in self.histograms.items()}
+            counters = dict(self.counters)
+        report = {}
+        for name, values in histograms.items():
+            if not values:
+                continue
+            report[name] = {
+                "count": len(values),
+                "p50": values[int(0.5 * (len(values) - 1))],
+                "p95": values[int(0.95 * (len(values) - 1))],
+                "max": values[-1],
+            }
+        return report, counters
+
+    def _snapshot(self):
+        with self.lock:
+            return list(self.events)
+
+    def write_jsonl(self, path, stats=None):
+        with open(path, "w", encoding="utf-8") as handle:
+            for event in self._snapshot():
+                handle.write(json.dumps(event, ensure_ascii=False) + "\n")
+            if stats:
+                handle.write(json.dumps({"name": "stats", "ph": "M", "args": stats}, ensure_ascii=False) + "\n")
+
+    def write_chrome_trace(self, path, stats=None):
+        pid = os.getpid()
+        events = []
+        for event in self._snapshot():
+            event = dict(event, pid=pid, cat="pdf_editor")
+            event.setdefault("tid", 0)
+            events.append(event)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": stats or {}}, handle, ensure_ascii=False)
+
+    def export(self, folder=None, stats=None):
+        folder = folder or data_dir("traces")
+        stem = os.path.join(folder, f"trace-{os.getpid()}-{int(time.time() * 1000)}")
+        self.write_jsonl(stem + ".jsonl", stats)
+        self.write_chrome_trace(stem + ".json", stats)
+        return stem + ".jsonl", stem + ".json"
+
+
+tracer = Tracer()
+tracer.configure_from_environment()
+
+
+def traced(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(tracer, name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -1,6 +1,8 @@
 ﻿import customtkinter as ctk
 import tkinter as tk
-from PIL import Image, ImageTk
+
+from pdf_engine import SAVE_PROFILE_LABELS
+from tracing import traced
 
 
 class UIComponents:
@@ -110,6 +112,32 @@ class UIComponents:
         app.delete_btn.grid(row=0, column=9, padx=(0, 8), pady=6)
         app.select_all_btn.grid(row=0, column=10, padx=(0, 12), pady=6)
 
+        app.save_profile_menu = ctk.CTkOptionMenu(
+            app.toolbar_frame,
+            values=list(SAVE_PROFILE_LABELS.values()),
+            variable=app.save_profile_var,
+            width=130,
+            font=app.ui_font,
+        )
+        app.save_profile_menu.grid(row=0, column=11, padx=(0, 12), pady=6)
+
+        app.save_status_frame = ctk.CTkFrame(app.toolbar_frame, fg_color="transparent")
+        app.save_status_label = ctk.CTkLabel(app.save_status_frame, text="", font=("Pretendard", 12))
+        app.save_progress = ctk.CTkProgressBar(app.save_status_frame, width=120)
+        app.save_cancel_btn = ctk.CTkButton(
+            app.save_status_frame,
+            text="✕",
+            width=28,
+            height=28,
+            command=app.handlers.cancel_save,
+            font=app.ui_font,
+        )
+        app.save_status_label.grid(row=0, column=0, padx=(0, 8))
+        app.save_progress.grid(row=0, column=1, padx=(0, 8))
+        app.save_cancel_btn.grid(row=0, column=2)
+        app.save_status_frame.grid(row=0, column=12, padx=(0, 12), pady=6)
+        app.save_status_frame.grid_remove()
+
         app.theme_switch = ctk.CTkSwitch(
             app.toolbar_frame,
             text="다크/라이트",
@@ -121,8 +149,10 @@ class UIComponents:
 
         app.info_size = ctk.CTkLabel(app.toolbar_frame, text="용량: -", font=("Pretendard", 12))
         app.info_pages = ctk.CTkLabel(app.toolbar_frame, text="페이지 수: -", font=("Pretendard", 12))
+        app.info_status = ctk.CTkLabel(app.toolbar_frame, text="", font=("Pretendard", 12))
         app.info_size.grid(row=0, column=14, padx=(0, 8), pady=6)
-        app.info_pages.grid(row=0, column=15, padx=(0, 12), pady=6)
+        app.info_pages.grid(row=0, column=15, padx=(0, 8), pady=6)
+        app.info_status.grid(row=0, column=16, padx=(0, 12), pady=6)
 
         self._attach_tooltip(app.open_btn, "PDF 열기")
         self._attach_tooltip(app.merge_btn, "파일 추가")
@@ -134,6 +164,8 @@ class UIComponents:
         self._attach_tooltip(app.rotate_right_btn, "오른쪽 90도 회전")
         self._attach_tooltip(app.delete_btn, "선택 삭제")
         self._attach_tooltip(app.select_all_btn, "전체 선택")
+        self._attach_tooltip(app.save_profile_menu, "저장 프로필")
+        self._attach_tooltip(app.save_cancel_btn, "저장 취소")
 
         app.nav_frame = ctk.CTkFrame(app, width=240, corner_radius=0)
         app.nav_frame.grid(row=1, column=0, sticky="nsew")
@@ -149,12 +181,10 @@ class UIComponents:
 
         app.viewer_vbar = tk.Scrollbar(app.viewer_frame, orient="vertical", command=app.viewer_canvas.yview)
         app.viewer_hbar = tk.Scrollbar(app.viewer_frame, orient="horizontal", command=app.viewer_canvas.xview)
-        app.viewer_canvas.configure(yscrollcommand=app.viewer_vbar.set, xscrollcommand=app.viewer_hbar.set)
+        app.viewer.attach(app.viewer_canvas, app.viewer_hbar, app.viewer_vbar)
         app.viewer_vbar.grid(row=0, column=1, sticky="ns")
         app.viewer_hbar.grid(row=1, column=0, sticky="ew")
 
-        app.viewer_image_id = None
-        app.viewer_photo = None
         app.viewer_page_index = None
         app.viewer_zoom = 1.0
 
@@ -180,6 +210,7 @@ class UIComponents:
                 state="hidden",
             )
         app.scroll_frame.bind("<Configure>", app._update_scrollregion)
+        app.thumbnails.attach(app.scroll_frame)
         app._refresh_undo_redo()
 
 
@@ -188,9 +219,8 @@ class UIComponents:
         app.viewer_page_index = None
         app.viewer_zoom = 1.0
         if hasattr(app, "viewer_canvas"):
+            app.viewer.clear()
             app.viewer_canvas.delete("all")
-            app.viewer_image_id = None
-            app.viewer_photo = None
             app.viewer_canvas.config(scrollregion=(0, 0, 0, 0))
 
     def show_page_in_viewer(self, page_index, reset_zoom=True):
@@ -205,41 +235,14 @@ class UIComponents:
             app.viewer_zoom = 1.0
         self._render_viewer_image()
 
+    @traced("ui.render_viewer_image")
     def _render_viewer_image(self):
         app = self.app
         if app.viewer_page_index is None:
             return
 
         app.viewer_canvas.update_idletasks()
-        available_w = max(1, app.viewer_canvas.winfo_width() - 24)
-        available_h = max(1, app.viewer_canvas.winfo_height() - 24)
-
-        base_scale = 1.0
-        pix = app.engine.get_page_pixmap(app.viewer_page_index, base_scale)
-        if pix is None:
-            return
-
-        scale_w = available_w / max(1, pix.width)
-        scale_h = available_h / max(1, pix.height)
-        fit_scale = min(scale_w, scale_h)
-        fit_scale = max(0.2, min(fit_scale, 2.0))
-
-        zoom = max(0.2, min(app.viewer_zoom, 4.0))
-        target_scale = fit_scale * zoom
-
-        if abs(target_scale - base_scale) > 0.01:
-            pix = app.engine.get_page_pixmap(app.viewer_page_index, target_scale)
-            if pix is None:
-                return
-
-        mode = "RGBA" if pix.alpha else "RGB"
-        image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
-        app.viewer_photo = ImageTk.PhotoImage(image)
-        if app.viewer_image_id is None:
-            app.viewer_image_id = app.viewer_canvas.create_image(0, 0, anchor="nw", image=app.viewer_photo)
-        else:
-            app.viewer_canvas.itemconfigure(app.viewer_image_id, image=app.viewer_photo)
-        app.viewer_canvas.config(scrollregion=(0, 0, pix.width, pix.height))
+        app.viewer.show(app.viewer_page_index, app.viewer_zoom)
 
     def _on_viewer_wheel(self, event):
         app = self.app
@@ -260,8 +263,8 @@ class UIComponents:
         ctrl_pressed = bool(getattr(event, "state", 0) & 0x0004)
         if ctrl_pressed:
             factor = 1.1 if delta > 0 else 0.9
-            app.viewer_zoom = max(0.2, min(app.viewer_zoom * factor, 4.0))
-            self._render_viewer_image()
+            app.viewer_zoom = app.viewer.clamp_zoom(app.viewer_zoom * factor)
+            app.viewer.zoom_to(app.viewer_zoom, (event.x, event.y))
             return
 
         # default: scroll vertically